@@ -24,7 +24,7 @@ from fern.cognitive import (
     prioritize_tasks
 )
 
-def demo_plan_feature():
+def demo_plan_feature(repo_path: Path):
     """Demonstrate the /plan_feature function"""
     print("=" * 60)
     print("DEMO: /plan_feature - Feature Planning")
@@ -41,9 +41,6 @@ def demo_plan_feature():
         print("-" * 40)
         
         try:
-            # Use current directory if no repo path provided
-            repo_path = Path.cwd() if len(sys.argv) < 2 else Path(sys.argv[1])
-            
             plan = plan_feature(goal, repo_path, max_chars=1000)
             print(f"Generated plan with {len(plan.subtasks)} subtasks:")
             
@@ -56,16 +53,13 @@ def demo_plan_feature():
         except Exception as e:
             print(f"Error: {e}")
 
-def demo_analyze_repo():
+def demo_analyze_repo(repo_path: Path):
     """Demonstrate the /analyze_repo function"""
     print("\n" + "=" * 60)
     print("DEMO: /analyze_repo - Repository Analysis")
     print("=" * 60)
     
     try:
-        # Use provided repo path or current directory
-        repo_path = Path.cwd() if len(sys.argv) < 2 else Path(sys.argv[1])
-        
         if not repo_path.exists():
             print(f"Repository path does not exist: {repo_path}")
             return
@@ -111,16 +105,13 @@ def demo_analyze_repo():
     except Exception as e:
         print(f"Error: {e}")
 
-def demo_detect_changes():
+def demo_detect_changes(repo_path: Path):
     """Demonstrate the /detect_changes function"""
     print("\n" + "=" * 60)
     print("DEMO: /detect_changes - Change Detection")
     print("=" * 60)
     
     try:
-        # Use provided repo path or current directory
-        repo_path = Path.cwd() if len(sys.argv) < 2 else Path(sys.argv[1])
-        
         if not repo_path.exists():
             print(f"Repository path does not exist: {repo_path}")
             return
@@ -166,7 +157,7 @@ def demo_detect_changes():
     except Exception as e:
         print(f"Error: {e}")
 
-def demo_prioritize_tasks():
+def demo_prioritize_tasks(repo_path: Path):
     """Demonstrate the /prioritize_tasks function"""
     print("\n" + "=" * 60)
     print("DEMO: /prioritize_tasks - Task Prioritization")
@@ -223,9 +214,6 @@ def demo_prioritize_tasks():
         print("-" * 30)
         
         try:
-            # Use current directory if no repo path provided
-            repo_path = Path.cwd() if len(sys.argv) < 2 else Path(sys.argv[1])
-            
             result = prioritize_tasks(
                 tasks_data=sample_tasks,
                 strategy=strategy,
@@ -257,16 +245,13 @@ def demo_prioritize_tasks():
         except Exception as e:
             print(f"Error: {e}")
 
-def demo_full_cognitive_analysis():
+def demo_full_cognitive_analysis(repo_path: Path):
     """Demonstrate complete cognitive analysis workflow"""
     print("\n" + "=" * 60)
     print("DEMO: Full Cognitive Analysis Workflow")
     print("=" * 60)
     
     try:
-        # Create cognitive API with repository path
-        repo_path = Path.cwd() if len(sys.argv) < 2 else Path(sys.argv[1])
-        
         if not repo_path.exists():
             print(f"Repository path does not exist: {repo_path}")
             return
@@ -383,8 +368,10 @@ def main():
     print(f"Timestamp: {datetime.now().isoformat()}")
     print(f"Working Directory: {Path.cwd()}")
     
+    # Resolve the target once and hand it to every demo
+    repo_path = Path(sys.argv[1]).resolve() if len(sys.argv) > 1 else Path.cwd()
+    
     if len(sys.argv) > 1:
-        repo_path = Path(sys.argv[1])
         print(f"Target Repository: {repo_path}")
         if not repo_path.exists():
             print(f"WARNING: Repository path does not exist: {repo_path}")
@@ -395,11 +382,11 @@ def main():
         print(f"Feature Goal: {sys.argv[2]}")
     
     # Run all demonstrations
-    demo_plan_feature()
-    demo_analyze_repo()
-    demo_detect_changes()
-    demo_prioritize_tasks()
-    demo_full_cognitive_analysis()
+    demo_plan_feature(repo_path)
+    demo_analyze_repo(repo_path)
+    demo_detect_changes(repo_path)
+    demo_prioritize_tasks(repo_path)
+    demo_full_cognitive_analysis(repo_path)
     
     print(f"\n" + "=" * 60)
     print("DEMONSTRATION COMPLETE")
@@ -1,6 +1,6 @@
 # fern/agents/base.py
 from __future__ import annotations
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from typing import Literal, Dict, Any, List
 import time
 
@@ -11,10 +11,11 @@ class Msg:
     role: Role
     content: str
     meta: Dict[str, Any] | None = None
-    ts: float = time.time()
+    ts: float = field(default_factory=time.time)
 
     def to_dict(self):
-        return asdict(self)
+        return {"role": self.role, "content": self.content,
+                "meta": None if self.meta is None else self.meta.copy(), "ts": self.ts}
 
 @dataclass
 class Task:
@@ -23,6 +24,9 @@ class Task:
     tool: str # "code" | "fs"| "shell"| "github"
     args: Dict[str, Any]
 
+    def to_dict(self):
+        return {"id": self.id, "desc": self.desc, "tool": self.tool, "args": self.args}
+
 @dataclass
 class Plan:
     tasks: List[Task]
@@ -3,25 +3,51 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Any, List
 from fern.tools.fs import apply_code_task
-from fern.tools.shell import run_cmd
-from fern.tools.git import git_commit_all
+from fern.tools.shell import run_batch
+from fern.tools.git import git_commit_all, git_commit_paths
 from fern.tools.logger import log_progress, log_success
 
-def execute_tasks(repo: Path, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _flush_shell(repo: Path, pending: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+    """Run a contiguous run of shell tasks in a single subprocess."""
+    if not pending:
+        return
+    cmds = [t.get("args", {}).get("cmd", "pytest -q") for t in pending]
+    for t, rc in zip(pending, run_batch(repo, cmds)):
+        results.append({"id": t.get("id"), "ok": rc == 0, "rc": rc})
+    pending.clear()
+
+BUILD_COMMIT_MSG = "fern(builder): apply tasks"
+
+def commit_build(repo: Path, touched: List[str], shell_ran: bool, msg: str = BUILD_COMMIT_MSG):
+    """Commit builder output; shell tasks may touch anything, so they force a full add."""
+    if shell_ran:
+        git_commit_all(repo, msg)
+    else:
+        git_commit_paths(repo, touched, msg)
+
+def execute_tasks(repo: Path, tasks: List[Dict[str, Any]], defer_commit: bool = False) -> Dict[str, Any]:
     results = []
+    touched: List[str] = []
+    pending_shell: List[Dict[str, Any]] = []
     for t in tasks:
         tool = t.get("tool")
         desc = t.get("desc", "")
         log_progress(f"Builder: {desc} ({tool})")
+        if tool == "shell":
+            pending_shell.append(t)
+            continue
+        _flush_shell(repo, pending_shell, results)
         if tool in ("code", "fs"):
-            apply_code_task(repo, t)
+            touched.extend(apply_code_task(repo, t))
             results.append({"id": t.get("id"), "ok": True})
-        elif tool == "shell":
-            cmd = t.get("args", {}).get("cmd", "pytest -q")
-            rc = run_cmd(repo, cmd)
-            results.append({"id": t.get("id"), "ok": rc == 0, "rc": rc})
         else:
             results.append({"id": t.get("id"), "ok": False, "reason": f"unknown tool {tool}"})
-    git_commit_all(repo, "fern(builder): apply tasks")
-    log_success("Builder: tasks applied & committed.")
-    return {"results": results}
+    _flush_shell(repo, pending_shell, results)
+    shell_ran = any(t.get("tool") == "shell" for t in tasks)
+    touched = list(dict.fromkeys(touched))
+    if defer_commit:
+        log_success("Builder: tasks applied (commit deferred).")
+    else:
+        commit_build(repo, touched, shell_ran)
+        log_success("Builder: tasks applied & committed.")
+    return {"results": results, "touched": touched, "shell_ran": shell_ran}
@@ -1,5 +1,7 @@
-import requests, subprocess
+import json, requests, subprocess
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # MCP endpoints (dev mode ports)
 OLLAMA_API = "http://localhost:11434/api/chat"
@@ -9,11 +11,22 @@ DEPLOY_MCP = "http://localhost:8003"
 
 WORKDIR = Path("/repos/repo")
 
+# (connect, read) timeouts; Ollama generations can take a while
+MCP_TIMEOUT = (3, 120)
+OLLAMA_TIMEOUT = (3, 600)
+GIT_TIMEOUT = 30
+
+# ---- HTTP Session ----
+# One pooled session keeps warm keep-alive sockets to the MCP servers and Ollama
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                     max_retries=Retry(total=2, backoff_factor=0.1)))
+
 # ---- MCP Client Helpers ----
 def call_mcp(base_url, endpoint, payload=None):
     """Send JSON payload to MCP endpoint"""
     url = f"{base_url}/{endpoint}"
-    r = requests.post(url, json=payload or {})
+    r = SESSION.post(url, json=payload or {}, timeout=MCP_TIMEOUT)
     r.raise_for_status()
     return r.json()
 
@@ -33,11 +46,20 @@ def generate_patch_with_ollama(errors: str, model: str = "qwen2.5-coder:14b"):
             {"role": "system", "content": "You are an expert Python engineer."},
             {"role": "user", "content": prompt}
         ],
-        "stream": False
+        "stream": True
     }
-    resp = requests.post(OLLAMA_API, json=payload)
-    resp.raise_for_status()
-    return resp.json()["message"]["content"]
+    # Ollama streams NDJSON chunks; collect content deltas as they arrive
+    buf = []
+    with SESSION.post(OLLAMA_API, json=payload, stream=True, timeout=OLLAMA_TIMEOUT) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            chunk = json.loads(line)
+            buf.append(chunk.get("message", {}).get("content", ""))
+            if chunk.get("done"):
+                break
+    return "".join(buf)
 
 # ---- Engineer Loop ----
 def engineer_loop(repo_url: str):
@@ -59,12 +81,12 @@ def engineer_loop(repo_url: str):
         patch = generate_patch_with_ollama(errors)
         print("Proposed patch:\n", patch)
 
-        # Save + apply patch
-        patch_file = WORKDIR / "PATCH.diff"
-        with open(patch_file, "w") as f:
-            f.write(patch)
-
-        subprocess.run(["git", "apply", str(patch_file)], cwd=WORKDIR, check=True)
+        # Apply patch straight from stdin; git apply is all-or-nothing, so a bad diff leaves no files touched
+        res = subprocess.run(["git", "apply", "-"], input=patch.encode(), cwd=WORKDIR,
+                             capture_output=True, timeout=GIT_TIMEOUT)
+        if res.returncode != 0:
+            print("❌ Patch did not apply:\n", res.stderr.decode(errors="replace"))
+            return
 
         # Commit + push
         call_mcp(REPO_MCP, "commit_and_push", {"message": "Fern auto-fix"})
@@ -1,35 +1,78 @@
 # fern/agents/reviewer_agent.py
 from __future__ import annotations
-import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from fern.tools.shell import run_cmd
+from fern.core.state import state_dir
+from fern.tools.shell import run_cmd, TIMEOUT_RC
+from fern.tools.fingerprint import tree_state
 from fern.tools.logger import log_info, log_error
-from fern.tools.llm import complete
+from fern.tools.llm import complete, extract_json_object, system_prompt
 
-REVIEW_SYS = """You are FERN's Reviewer.
+REVIEW_SYS = system_prompt("""You are FERN's Reviewer.
 Given test/lint/typecheck results, propose a small follow-up task list (JSON) to fix issues.
 If everything passes, return {"tasks": []}.
-JSON schema: {"tasks":[{"id":"R1","desc":"...","tool":"code|fs|shell","args":{}}]}"""
+JSON schema: {"tasks":[{"id":"R1","desc":"...","tool":"code|fs|shell","args":{}}]}""")
+
+QUALITY_CMDS = (("tests", "pytest -q"), ("lint", "ruff check ."), ("type", "mypy ."))
+
+# What mypy's verdict depends on: sources, stubs and every file mypy reads its config from
+PY_STATE_PATHSPECS = ("*.py", "*.pyi", "mypy.ini", ".mypy.ini", "pyproject.toml", "setup.cfg")
+
+def _last_review_file(repo: Path) -> Path:
+    return repo / ".fern" / "last_review"
+
+def _load_last_review(repo: Path) -> dict:
+    try:
+        return orjson.loads(_last_review_file(repo).read_bytes())
+    except Exception:
+        return {}
 
 def run_quality_checks(repo: Path) -> dict:
-    tests = run_cmd(repo, "pytest -q")
-    lint  = run_cmd(repo, "ruff check .")
-    typec = run_cmd(repo, "mypy .")
-    ok = (tests == 0) and (lint == 0) and (typec == 0)
-    return {"tests_ok": tests == 0, "lint_ok": lint == 0, "type_ok": typec == 0, "all_ok": ok}
+    state = tree_state(repo, *PY_STATE_PATHSPECS)
+    last = _load_last_review(repo)
+    # mypy is the slowest check; reuse its verdict when nothing it reads changed since last review
+    skip_type = last.get("state") == state
+    cmds = [(n, c) for n, c in QUALITY_CMDS if not (skip_type and n == "type")]
+    if skip_type:
+        log_info("Reviewer: no Python or mypy config changes since last review, reusing mypy result.")
+
+    # each check is an isolated subprocess, so run them side by side
+    with ThreadPoolExecutor(max_workers=len(cmds)) as ex:
+        futs = {name: ex.submit(run_cmd, repo, cmd) for name, cmd in cmds}
+        rcs = {name: f.result() for name, f in futs.items()}
+    if skip_type:
+        rcs["type"] = 0 if last.get("type_ok") else 1
+    typec = rcs["type"]
+    # a check that hit its time limit says nothing about the code: report it as unknown
+    timed_out = [name for name, rc in rcs.items() if rc == TIMEOUT_RC]
+    ok = {name: None if rc == TIMEOUT_RC else rc == 0 for name, rc in rcs.items()}
+    # a timed-out run has no verdict to reuse
+    if typec != TIMEOUT_RC:
+        try:
+            state_dir(repo)
+            _last_review_file(repo).write_bytes(orjson.dumps({"state": state, "type_ok": typec == 0}))
+        except OSError:
+            pass
+    return {"tests_ok": ok["tests"], "lint_ok": ok["lint"], "type_ok": ok["type"],
+            "timed_out": timed_out, "all_ok": all(v is True for v in ok.values())}
 
 def review_and_suggest(repo: Path, goal: str) -> dict:
     qc = run_quality_checks(repo)
     if qc["all_ok"]:
         log_info("Reviewer: all checks passed.")
         return {"quality": qc, "followups": {"tasks": []}}
+    if not any(qc[k] is False for k in ("tests_ok", "lint_ok", "type_ok")):
+        # nothing actually failed; asking the model would have it "fix" errors that don't exist
+        log_error(f"Reviewer: {', '.join(qc['timed_out'])} timed out; no failures to fix.")
+        return {"quality": qc, "followups": {"tasks": []}}
 
     # build a compact textual report for the model
-    report = json.dumps(qc)
+    report = orjson.dumps(qc).decode()
     prompt = f"Goal: {goal}\nQuality report: {report}\nReturn JSON only."
-    txt = complete(prompt, sys=REVIEW_SYS)
+    # never cached: the prompt carries no repo state, so a stored reply would repeat stale follow-ups
     try:
-        follow = json.loads(txt)
+        follow = orjson.loads(extract_json_object(complete(prompt, sys=REVIEW_SYS)))
     except Exception:
         follow = {"tasks": []}
     if not follow.get("tasks"):
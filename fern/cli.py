@@ -1,128 +1,191 @@
 from pathlib import Path
-import typer, json, os
+import typer, orjson, os, subprocess
 from rich.console import Console
 
-from fern.core.agent import run_goal   # 👈 use run_goal instead of operate
-from fern.tasks.scaffold import scaffold_project
-from fern.tasks.review import review_repo
-from fern.tools.github import ensure_remote_repo, open_pr
-from fern.tools.git import git_init, git_commit_all, git_push
-from fern.core.state import load_history, compute_stats
-from fern.tools.banner import show_banner
-from fern.agents.coordinator import run_multi_agent
-
+# Commands import the agent/LLM/git stack inside their bodies, so cheap
+# commands like `status` don't pay for modules they never use.
 
 console = Console()
+
+def _print(*args, **kwargs):
+    """console.print() after any queued log lines, so command output stays in order."""
+    from fern.tools.logger import flush_logs
+
+    flush_logs()
+    console.print(*args, **kwargs)
+
+def _run_tolerant(argv: list[str], repo: Path) -> int:
+    """Run a tool without a shell; failures (even a missing binary) are non-fatal.
+
+    Output is captured and only shown when the tool fails.
+    """
+    name = Path(argv[0]).name
+    try:
+        proc = subprocess.run(argv, cwd=repo, check=False, capture_output=True, text=True)
+    except OSError as e:
+        _print(f"[yellow]FERN:[/] could not run {name}: {e}")
+        return 127
+    if proc.returncode == 0:
+        _print(f"[green]FERN:[/] {name} ok")
+    else:
+        _print(f"[yellow]FERN:[/] {name} exited with {proc.returncode}")
+        output = (proc.stdout + proc.stderr).strip()
+        if output:
+            _print(output, markup=False, highlight=False)
+    return proc.returncode
+
+def _pretty(obj) -> str:
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
 app = typer.Typer(help="FERN: Full-stack Engineering Reinforcement Navigator")
 
 @app.command()
 def chat(path: str = "."):
+    from fern.core.agent import run_goal   # 👈 use run_goal instead of operate
+    from fern.tools.banner import show_banner
+    from fern.tools.logger import flush_logs
+
     repo = Path(path)
     repo.mkdir(parents=True, exist_ok=True)
 
     show_banner()
     
-    console.print("[bold green]FERN:[/] 🌱 You can talk to me while I’m building your project.")
+    _print("[bold green]FERN:[/] 🌱 You can talk to me while I’m building your project.")
 
     history = []
     while True:
         try:
+            flush_logs()  # don't let queued log lines land after the prompt
             user_input = console.input("[bold cyan]You:[/] ")
             if user_input.lower() in {"exit", "quit"}:
-                console.print("[yellow]FERN:[/] Goodbye!")
+                _print("[yellow]FERN:[/] Goodbye!")
                 break
 
             history.append({"role": "user", "content": user_input})
             # 🔁 now uses retry + self-healing
             result = run_goal(repo, user_input, max_retries=3)
-            console.print(f"[magenta]FERN result:[/]\n{json.dumps(result, indent=2)}")
+            _print(f"[magenta]FERN result:[/]\n{_pretty(result)}")
         except KeyboardInterrupt:
-            console.print("\n[yellow]FERN:[/] Stopping session.")
+            _print("\n[yellow]FERN:[/] Stopping session.")
             break
 
 @app.command()
 def multi(goal: str, path: str =".", rounds: int = 3):
+    from fern.agents.coordinator import run_multi_agent
+
     repo = Path(path)
     repo.mkdir(parents=True, exist_ok=True)
     result = run_multi_agent(repo, goal, max_rounds=rounds)
-    console.print(f"[magenta]FERN result:[/]\n{json.dumps(result, indent=2)}")
+    _print(f"[magenta]FERN result:[/]\n{_pretty(result)}")
 
 @app.command()
 def scaffold(name: str, template: str = "py_lib", path: str = "."):
+    from fern.tasks.scaffold import scaffold_project
+    from fern.tools.git import git_init, git_commit_all
+
     project_dir = Path(path) / name
     project_dir.mkdir(parents=True, exist_ok=True)
     git_init(project_dir)
     scaffold_project(project_dir, template=template, name=name)
     git_commit_all(project_dir, "chore: scaffold project")
-    console.print(f"[green]FERN:[/] Scaffolded {name} at {project_dir}")
+    _print(f"[green]FERN:[/] Scaffolded {name} at {project_dir}")
 
 @app.command()
-def batch(plan: str = "fern.plan.json", path: str = "."):
+def batch(plan: str = "fern.plan.json", path: str = ".", sequential: bool = False):
+    import shutil
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from fern.core.agent import run_goal
+    from fern.tools.git import git_commit_all
+
     repo = Path(path)
-    with open(plan) as f:
-        goals = json.load(f)["goals"]
+    goals = orjson.loads(Path(plan).read_bytes())["goals"]
 
-    for g in goals:
-        console.print(f"[cyan]FERN:[/] Working on {g}")
+    def work(g: str) -> dict:
+        _print(f"[cyan]FERN:[/] Working on {g}")
         # 🔁 now uses retry + self-healing
-        result = run_goal(repo, g, max_retries=3)
-        console.print(f"[magenta]Plan result:[/]\n{json.dumps(result, indent=2)}")
-        os.system("ruff check . --fix || true")
-        os.system("pytest -q || true")
-        git_commit_all(repo, f"fern: {g}")
+        return run_goal(repo, g, max_retries=3)
+
+    # goals overlap their LLM planning; repo writes are serialized inside operate()
+    workers = 1 if sequential else max(1, int(os.environ.get("FERN_BATCH_WORKERS", "3")))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futs = {ex.submit(work, g): g for g in goals}
+        for done, fut in enumerate(as_completed(futs), 1):
+            _print(f"[magenta]Plan result ({done}/{len(goals)}):[/]\n{_pretty(fut.result())}")
+
+    # lint/test/commit mutate the shared tree, so run them once for the whole batch;
+    # sequentially, because `ruff --fix` rewrites files pytest is about to import
+    _run_tolerant([shutil.which("ruff") or "ruff", "check", ".", "--fix"], repo)
+    _run_tolerant([shutil.which("pytest") or "pytest", "-q"], repo)
+    git_commit_all(repo, f"fern: batch of {len(goals)} goal(s)")
 
 @app.command()
 def status(path: str = "."):
+    from fern.core.state import load_history
+
     repo = Path(path)
     hist = load_history(repo)
     if not hist:
-        console.print("[yellow]FERN:[/] No history found.")
+        _print("[yellow]FERN:[/] No history found.")
         return
-    console.print("[bold green]🌱 FERN Status [/]")
+    _print("[bold green]🌱 FERN Status [/]")
     for h in hist[-5:]:
-        console.print(f"• {h['ts']}: {h['goal']} -> reward {h.get('reward', 0):.2f}")
+        _print(f"• {h['ts']}: {h['goal']} -> reward {h.get('reward', 0):.2f}")
 
 @app.command()
 def review(path: str = "."):
+    from fern.tasks.review import review_repo
+
     review_repo(Path(path))
 
 @app.command()
 def sync(path: str = ".", private: bool = True):
+    from fern.tools.github import ensure_remote_repo
+    from fern.tools.git import git_push
+
     repo_url = ensure_remote_repo(Path(path), private=private)
     git_push(Path(path), "origin", "main")
-    console.print(f"[green]FERN:[/] Pushed to {repo_url}")
+    _print(f"[green]FERN:[/] Pushed to {repo_url}")
 
 @app.command()
 def pr(title: str, body: str = "", path: str = "."):
+    from fern.tools.github import open_pr
+
     url = open_pr(Path(path), title, body)
-    console.print(f"[green]FERN:[/] PR opened: {url}")
+    _print(f"[green]FERN:[/] PR opened: {url}")
 
 @app.command()
 def report(path: str = "."):
+    from fern.core.state import load_stats
+    from fern.tools.llm_cache import cache_stats
+
     repo = Path(path)
-    hist = load_history(repo)
-    stats = compute_stats(hist)
+    stats = load_stats(repo)
     
     if stats["runs"] == 0:
-        console.print("[yellow]FERN:[/] No runs yet.")
+        _print("[yellow]FERN:[/] No runs yet.")
         return
-    console.print("[bold green]🌱 FERN Report [/]")
-    console.print(f"Total runs: {stats['runs']}")
-    console.print(f"Average reward: {stats['avg_reward']:.2f}")
-    console.print(f"Tests pass rate: {stats['tests_pass_rate']*100:.1f}%")
-    console.print(f"Lint pass rate: {stats['lint_pass_rate']*100:.1f}%")
-    console.print(f"Typecheck pass rate: {stats['type_pass_rate']*100:.1f}%")
+    _print("[bold green]🌱 FERN Report [/]")
+    _print(f"Total runs: {stats['runs']}")
+    _print(f"Average reward: {stats['avg_reward']:.2f}")
+    _print(f"Tests pass rate: {stats['tests_pass_rate']*100:.1f}%")
+    _print(f"Lint pass rate: {stats['lint_pass_rate']*100:.1f}%")
+    _print(f"Typecheck pass rate: {stats['type_pass_rate']*100:.1f}%")
 
     last = stats["last"]
-    console.print("\n[bold cyan]Last run:[/]")
-    console.print(f"  Goal: {last['goal']}")
-    console.print(f"  Reward: {last['reward']:.2f}")
-    console.print(f"  Tests: {'✅' if last['tests_pass'] else '❌'}")
-    console.print(f"  Lint: {'✅' if last['lint_ok'] else '❌'}")
-    console.print(f"  Typecheck: {'✅' if last['type_ok'] else '❌'}")
-    console.print(f"  Time: {last['ts']}")
+    _print("\n[bold cyan]Last run:[/]")
+    _print(f"  Goal: {last['goal']}")
+    _print(f"  Reward: {last['reward']:.2f}")
+    _print(f"  Tests: {'✅' if last['tests_pass'] else '❌'}")
+    _print(f"  Lint: {'✅' if last['lint_ok'] else '❌'}")
+    _print(f"  Typecheck: {'✅' if last['type_ok'] else '❌'}")
+    _print(f"  Time: {last['ts']}")
+
+    cache = cache_stats()
+    _print(f"\n[bold cyan]LLM cache:[/] {cache['hits']} hits / {cache['misses']} misses")
 
 def main():
+    from fern.tools.banner import show_banner
+
     show_banner()
     print("FERN 🌱 is ready to help.")
 
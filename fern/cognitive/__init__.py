@@ -1,13 +1,14 @@
 # Cognitive Planning Layer for Fern
 from .planner import plan_feature, FeaturePlan, Subtask
-from .analyzer import analyze_repo, RepositoryAnalysis
+from .analyzer import analyze_repo, analyze_repos, RepositoryAnalysis
 from .detector import detect_changes, analyze_pull_request, ChangeSet, CommitAnalysis, PullRequestAnalysis
 from .prioritizer import prioritize_tasks, TaskItem, TaskPrioritizer
-from .api import CognitiveAPI, create_cognitive_api
+from .api import CognitiveAPI, CognitiveResults, create_cognitive_api
 
 __all__ = [
     'plan_feature',
     'analyze_repo', 
+    'analyze_repos',
     'detect_changes',
     'prioritize_tasks',
     'FeaturePlan',
@@ -19,5 +20,6 @@ __all__ = [
     'TaskItem',
     'TaskPrioritizer',
     'CognitiveAPI',
+    'CognitiveResults',
     'create_cognitive_api'
 ]
\ No newline at end of file
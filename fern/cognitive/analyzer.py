@@ -1,13 +1,139 @@
 # Repository Analysis - Cognitive Layer
 from __future__ import annotations
+import hashlib
 import json
+import os
+import orjson
 import re
+import subprocess
+import threading
+import tomllib
+from collections import Counter, deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from fern.tools.llm import complete
+from fern.tools.llm import extract_json_object
+from fern.tools.llm_cache import CACHE_DIR, _atomic_write, cached_complete_batch, evict, semantic_complete
 from fern.tools.fs import snapshot_repo
+from fern.tools.fingerprint import tree_state
 from fern.tools.logger import log_info, log_progress
 
+# Directories worth surfacing in the structure summary
+IMPORTANT_DIRS = ('src', 'lib', 'app', 'tests', 'docs', 'scripts')
+
+# Hidden directories still scanned, but only for key-file detection (CI configs)
+KEY_HIDDEN_DIRS = ('.github',)
+
+# Directories never worth descending into: VCS metadata, envs, build output, caches
+SKIP_DIRS = frozenset({
+    '.git', 'node_modules', '.venv', 'venv', '__pycache__', 'dist', 'build',
+    'target', '.tox', '.mypy_cache', '.pytest_cache'
+})
+
+# Finished analyses, kept next to the LLM cache (outside every analyzed work tree) and
+# shared by all repos; the ANALYSIS_CACHE_KEEP most recently used survive
+ANALYSIS_CACHE_DIR = CACHE_DIR.parent / "analysis"
+ANALYSIS_CACHE_KEEP = 64
+# one lock per fingerprint: concurrent callers for the same tree wait for the first
+# analysis and read it from the cache instead of repeating the LLM call
+_analysis_locks: Dict[str, threading.Lock] = {}
+_analysis_locks_guard = threading.Lock()
+
+# Lines of README read for the summary and purpose heuristics
+README_MAX_LINES = 200
+
+# Entries listed in the LLM file summary
+FILE_SUMMARY_LIMIT = 50
+
+# README keywords per purpose, in priority order
+PURPOSES = (
+    ('web application', ('web', 'http', 'server', 'api')),
+    ('library/package', ('library', 'package', 'sdk', 'module')),
+    ('tool/utility', ('tool', 'utility', 'script', 'cli')),
+    ('data analysis', ('data', 'analytics', 'machine learning', 'ml')),
+    ('mobile app', ('mobile', 'ios', 'android')),
+    ('game', ('game', 'gaming', 'play')),
+)
+_PURPOSE_RANK = {kw: rank for rank, (_, kws) in reversed(list(enumerate(PURPOSES))) for kw in kws}
+# Substring semantics: a lookahead reports a hit at every offset, longest keyword first
+_PURPOSE_RE = re.compile('(?=(' + '|'.join(map(re.escape, sorted(_PURPOSE_RANK, key=len, reverse=True))) + '))')
+
+def _iter_entries(root, skip=SKIP_DIRS):
+    """
+    Yield (relative_path, DirEntry) for every non-hidden file and directory under root.
+    
+    Hidden and skipped directories are pruned before they are opened, so their
+    contents are never listed. Traversal is breadth-first (shallowest entries first).
+    """
+    queue = deque([("", os.fspath(root))])
+    while queue:
+        prefix, path = queue.popleft()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    name = entry.name
+                    if name[:1] == '.':
+                        continue
+                    rel_path = prefix + name
+                    if entry.is_dir(follow_symlinks=False):
+                        if name in skip:
+                            continue
+                        queue.append((rel_path + "/", entry.path))
+                    yield rel_path, entry
+        except OSError:
+            continue
+
+def _git_ls_files(root) -> Optional[List[str]]:
+    """
+    List tracked and untracked-but-not-ignored files via git's index.
+    
+    Returns None when root is not inside a git work tree (or git is unavailable),
+    so callers can fall back to walking the filesystem.
+    """
+    try:
+        proc = subprocess.run(
+            ['git', '-C', os.fspath(root), 'ls-files', '-co', '--exclude-standard', '-z'],
+            capture_output=True, timeout=30
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if proc.returncode != 0 or not proc.stdout:
+        return None
+    return [p for p in os.fsdecode(proc.stdout).split('\0') if p]
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate an rglob-style pattern into a regex over '/'-joined relative paths"""
+    parts = []
+    for ch in pattern:
+        if ch == '*':
+            parts.append('[^/]*')
+        elif ch == '?':
+            parts.append('[^/]')
+        else:
+            parts.append(re.escape(ch))
+    # rglob matches the pattern against the trailing path components at any depth
+    return '(?:^|/)' + ''.join(parts) + '$'
+
+# Key file globs per category (rglob semantics: matched at any depth)
+KEY_FILE_PATTERNS = {
+    'config': ['*.conf', '*.config', '*.ini', '*.cfg', 'config/*'],
+    'docker': ['Dockerfile', 'docker-compose.yml', 'docker-compose.yaml'],
+    'ci': ['.github/workflows/*', '.gitlab-ci.yml', '.travis.yml'],
+    'docs': ['README*', 'docs/*', '*.md'],
+    'tests': ['test*', 'tests/*', '*_test*', '*Test*']
+}
+# Wildcard patterns are matched against the file index; literal names are checked at the root
+_KEY_FILE_SEARCH = [
+    (category, re.compile('|'.join(f'(?:{_glob_to_regex(p)})' for p in patterns if '*' in p)).search)
+    for category, patterns in KEY_FILE_PATTERNS.items()
+    if any('*' in p for p in patterns)
+]
+
+# Interned lowercase file suffixes shared by every file index
+_SUFFIXES: Dict[str, str] = {}
+
 class RepositoryAnalysis:
     def __init__(self, repo_path: Path):
         self.repo_path = repo_path
@@ -17,74 +143,141 @@ class RepositoryAnalysis:
         self.dependencies = {}
         self.structure = {}
         self.readme_content = ""
+        self._readme_lower = ""
         self.key_files = {}
         self.framework_detected = None
         self.build_system = None
+        self.llm_failed = False
+        
+        # Columnar file index filled by a single tree walk (see _walk_once);
+        # row i of every column describes the same file
+        self._walked = False
+        self._files: Dict[str, list] = {'rel': [], 'name': [], 'suffix': [], 'depth': []}
+        self.hidden_files: List[str] = []
         
     def analyze(self) -> Dict[str, Any]:
         """Perform comprehensive repository analysis"""
         log_progress(f"Analyzing repository: {self.repo_path}")
         
         try:
-            # Basic structure analysis
-            self._analyze_structure()
-            
-            # Detect project type and framework
-            self._detect_project_type()
-            
-            # Extract dependencies
-            self._extract_dependencies()
-            
-            # Analyze key files
-            self._analyze_key_files()
-            
-            # Read README if present
-            self._analyze_readme()
+            self._analyze_local()
             
             # Use LLM for deeper understanding
             self._analyze_with_llm()
             
-            # Compile final analysis
-            self.analysis = {
-                "project_type": self.project_type,
-                "main_language": self.main_language,
-                "framework": self.framework_detected,
-                "build_system": self.build_system,
-                "dependencies": self.dependencies,
-                "structure": self.structure,
-                "key_files": self.key_files,
-                "readme_summary": self._summarize_readme(),
-                "purpose": self._infer_purpose(),
-                "complexity_score": self._calculate_complexity(),
-                "analysis_timestamp": str(Path().cwd())
-            }
-            
-            log_info(f"Repository analysis completed - Type: {self.project_type}, Framework: {self.framework_detected}")
-            return self.analysis
+            return self._compile_analysis()
             
         except Exception as e:
             log_info(f"Analysis failed: {e}")
             return {"error": str(e)}
     
+    def _analyze_local(self):
+        """Run every analysis step that only needs the filesystem"""
+        # Basic structure analysis
+        self._analyze_structure()
+        
+        # Detect project type and framework
+        self._detect_project_type()
+        
+        # Extract dependencies
+        self._extract_dependencies()
+        
+        # Analyze key files
+        self._analyze_key_files()
+        
+        # Read README if present
+        self._analyze_readme()
+    
+    def _compile_analysis(self) -> Dict[str, Any]:
+        """Assemble the final analysis dict from the collected results"""
+        self.analysis = {
+            "project_type": self.project_type,
+            "main_language": self.main_language,
+            "framework": self.framework_detected,
+            "build_system": self.build_system,
+            "dependencies": self.dependencies,
+            "dependency_count": self._count_dependencies(),
+            "structure": self.structure,
+            "key_files": self.key_files,
+            "readme_summary": self._summarize_readme(),
+            "purpose": self._infer_purpose(),
+            "complexity_score": self._calculate_complexity(),
+            "analysis_timestamp": datetime.now().isoformat()
+        }
+        
+        log_info(f"Repository analysis completed - Type: {self.project_type}, Framework: {self.framework_detected}")
+        return self.analysis
+    
+    def _walk_once(self):
+        """Walk the repository once and build the file indices every analysis step reads"""
+        if self._walked:
+            return
+        self._walked = True
+        
+        git_files = _git_ls_files(self.repo_path)
+        if git_files is not None:
+            self._index_paths(git_files)
+            return
+        
+        for rel_path, entry in _iter_entries(self.repo_path):
+            name = entry.name
+            if entry.is_dir(follow_symlinks=False):
+                # Track important directories (shallowest occurrence wins)
+                if len(name) < 20 and name.lower() in IMPORTANT_DIRS:
+                    self.structure.setdefault(name.lower(), rel_path)
+            elif entry.is_file():
+                self._add_file(rel_path, name)
+        
+        for hidden in KEY_HIDDEN_DIRS:
+            for rel_path, entry in _iter_entries(self.repo_path / hidden):
+                if entry.is_file():
+                    self.hidden_files.append(f"{hidden}/{rel_path}")
+    
+    def _add_file(self, rel_path: str, name: str):
+        files = self._files
+        files['rel'].append(rel_path)
+        files['name'].append(name)
+        # Matches splitext for the non-hidden names indexed here; the few distinct
+        # suffixes are interned so the column holds shared string objects
+        dot = name.rfind('.')
+        suffix = name[dot:].lower() if dot > 0 else ''
+        files['suffix'].append(_SUFFIXES.setdefault(suffix, suffix))
+        files['depth'].append(rel_path.count('/'))
+    
+    def _index_paths(self, paths: List[str]):
+        """Build the same indices as the filesystem walk from a git file listing"""
+        shallowest: Dict[str, tuple] = {}
+        for rel_path in paths:
+            parts = rel_path.split('/')
+            if parts[0] in KEY_HIDDEN_DIRS:
+                self.hidden_files.append(rel_path)
+                continue
+            if any(part[:1] == '.' for part in parts) or any(part in SKIP_DIRS for part in parts[:-1]):
+                continue
+            
+            self._add_file(rel_path, parts[-1])
+            
+            # Important directories are only known through the files inside them
+            for depth, part in enumerate(parts[:-1]):
+                key = part.lower()
+                if len(part) < 20 and key in IMPORTANT_DIRS:
+                    candidate = (depth, '/'.join(parts[:depth + 1]))
+                    if key not in shallowest or candidate < shallowest[key]:
+                        shallowest[key] = candidate
+        
+        for key, (_, rel_path) in shallowest.items():
+            self.structure.setdefault(key, rel_path)
+    
+    def _fingerprint(self, analysis_depth: str) -> str:
+        """Hash of the repo location, its working-tree state (see tree_state) and the analysis depth"""
+        h = hashlib.sha256(f"{self.repo_path.resolve()}\0{analysis_depth}\0".encode())
+        h.update(tree_state(self.repo_path).encode())
+        return h.hexdigest()[:32]
+    
     def _analyze_structure(self):
         """Analyze repository directory structure"""
-        structure = {}
-        
         try:
-            for item in self.repo_path.rglob("*"):
-                if item.is_file() and not any(part.startswith('.') for part in item.parts):
-                    rel_path = str(item.relative_to(self.repo_path))
-                    extension = item.suffix.lower()
-                    
-                    if extension not in structure:
-                        structure[extension] = []
-                    structure[extension].append(rel_path)
-                    
-                    # Track important directories
-                    if item.is_dir() and len(item.name) < 20:
-                        if item.name.lower() in ['src', 'lib', 'app', 'tests', 'docs', 'scripts']:
-                            self.structure[item.name.lower()] = str(item.relative_to(self.repo_path))
-                            
+            self._walk_once()
         except Exception as e:
             log_info(f"Structure analysis error: {e}")
             self.structure = {"error": str(e)}
@@ -112,13 +305,13 @@ class RepositoryAnalysis:
         else:
             # Fallback to file extension analysis
             try:
+                self._walk_once()
+                suffix_counts = Counter(self._files['suffix'])
                 extensions = {}
-                for file in self.repo_path.rglob("*.py"):
-                    extensions['py'] = extensions.get('py', 0) + 1
-                for file in self.repo_path.rglob("*.js"):
-                    extensions['js'] = extensions.get('js', 0) + 1
-                for file in self.repo_path.rglob("*.ts"):
-                    extensions['ts'] = extensions.get('ts', 0) + 1
+                for ext in ('py', 'js', 'ts'):
+                    count = suffix_counts['.' + ext]
+                    if count:
+                        extensions[ext] = count
                     
                 if extensions:
                     self.main_language = max(extensions, key=extensions.get)
@@ -137,7 +330,6 @@ class RepositoryAnalysis:
             
             if (self.repo_path / "pyproject.toml").exists():
                 try:
-                    import tomllib
                     with open(self.repo_path / "pyproject.toml", "rb") as f:
                         pyproject = tomllib.load(f)
                     
@@ -165,10 +357,10 @@ class RepositoryAnalysis:
             # Rust dependencies
             if (self.repo_path / "Cargo.toml").exists():
                 try:
-                    cargo_toml = (self.repo_path / "Cargo.toml").read_text()
-                    deps = re.findall(r'^([a-zA-Z0-9_-]+)\s*=', cargo_toml, re.MULTILINE)
-                    self.dependencies['rust'] = deps
-                except Exception as e:
+                    with open(self.repo_path / "Cargo.toml", "rb") as f:
+                        cargo = tomllib.load(f)
+                    self.dependencies['rust'] = list(cargo.get('dependencies', {})) + list(cargo.get('dev-dependencies', {}))
+                except (tomllib.TOMLDecodeError, OSError) as e:
                     log_info(f"Could not parse Cargo.toml: {e}")
                     
         except Exception as e:
@@ -176,44 +368,56 @@ class RepositoryAnalysis:
     
     def _analyze_key_files(self):
         """Analyze key configuration and source files"""
-        key_patterns = {
-            'config': ['*.conf', '*.config', '*.ini', '*.cfg', 'config/*'],
-            'docker': ['Dockerfile', 'docker-compose.yml', 'docker-compose.yaml'],
-            'ci': ['.github/workflows/*', '.gitlab-ci.yml', '.travis.yml'],
-            'docs': ['README*', 'docs/*', '*.md'],
-            'tests': ['test*', 'tests/*', '*_test*', '*Test*']
-        }
+        try:
+            self._walk_once()
+        except Exception:
+            pass
         
-        for category, patterns in key_patterns.items():
+        for category in KEY_FILE_PATTERNS:
             self.key_files[category] = []
-            
+        
+        # One pass over the file list, one combined regex per category
+        for rel_path in self._files['rel'] + self.hidden_files:
+            for category, search in _KEY_FILE_SEARCH:
+                if search(rel_path):
+                    self.key_files[category].append(rel_path)
+        
+        for category, patterns in KEY_FILE_PATTERNS.items():
             for pattern in patterns:
-                if '*' in pattern:
-                    try:
-                        for match in self.repo_path.rglob(pattern):
-                            if match.is_file():
-                                self.key_files[category].append(str(match.relative_to(self.repo_path)))
-                    except Exception:
-                        pass
-                else:
+                if '*' not in pattern:
                     file_path = self.repo_path / pattern
                     if file_path.exists():
                         self.key_files[category].append(pattern)
     
     def _analyze_readme(self):
         """Extract and analyze README content"""
-        readme_files = list(self.repo_path.glob("README*"))
-        if readme_files:
+        readme_file = next(self.repo_path.glob("README*"), None)
+        if readme_file:
             try:
-                readme_file = readme_files[0]
-                self.readme_content = readme_file.read_text(encoding='utf-8', errors='ignore')
+                # The summary and purpose heuristics only look at the head of the file
+                with open(readme_file, encoding='utf-8', errors='ignore') as f:
+                    self.readme_content = "".join(islice(f, README_MAX_LINES))
+                self._readme_lower = self.readme_content.lower()
             except Exception as e:
                 log_info(f"Could not read README: {e}")
     
     def _analyze_with_llm(self):
         """Use LLM for deeper project understanding"""
+        prompt = None
         try:
-            prompt = f"""Analyze this repository snapshot and identify:
+            prompt = self._llm_prompt()
+            if not self._apply_llm_response(semantic_complete(prompt)):
+                raise ValueError("no JSON object in the reply")
+        except Exception as e:
+            log_info(f"LLM analysis failed: {e}")
+            self.llm_failed = True
+            if prompt is not None:
+                # don't keep a reply we couldn't use; the next analysis asks the model again
+                evict(prompt)
+    
+    def _llm_prompt(self) -> str:
+        """Build the LLM analysis prompt from the repository file summary"""
+        return f"""Analyze this repository snapshot and identify:
 
 1. Framework/CMS used (if any)
 2. Primary purpose/functionality  
@@ -225,29 +429,32 @@ Repository files:
 {self._get_file_summary()}
 
 Return only JSON with these keys."""
-            
-            response = complete(prompt)
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                llm_analysis = json.loads(json_match.group())
-                self.framework_detected = llm_analysis.get('framework')
-                # Add other LLM insights to analysis
-                if 'complexity' in llm_analysis:
-                    self.analysis['complexity'] = llm_analysis['complexity']
-                    
-        except Exception as e:
-            log_info(f"LLM analysis failed: {e}")
+    
+    def _apply_llm_response(self, response: str) -> bool:
+        """Merge the LLM's JSON insights into the analysis; False when the reply holds no JSON object"""
+        # Balanced-brace scan: stops at the first complete object even if prose or more JSON follows
+        candidate = extract_json_object(response)
+        if candidate.lstrip().startswith('{'):
+            llm_analysis = json.loads(candidate)
+            self.framework_detected = llm_analysis.get('framework')
+            # Add other LLM insights to analysis
+            if 'complexity' in llm_analysis:
+                self.analysis['complexity'] = llm_analysis['complexity']
+            return True
+        return False
     
     def _get_file_summary(self) -> str:
         """Get summary of repository files for LLM analysis"""
         summary_parts = []
         
-        # Top-level files
+        # Top-level files, sorted so identical trees produce identical prompts (and cache keys)
         try:
-            for item in self.repo_path.iterdir():
-                if item.is_file() and not item.name.startswith('.'):
+            with os.scandir(self.repo_path) as it:
+                entries = sorted((e for e in it if not e.name.startswith('.')), key=lambda e: e.name)
+            for item in islice(entries, FILE_SUMMARY_LIMIT):
+                if item.is_file():
                     summary_parts.append(f"File: {item.name}")
-                elif item.is_dir() and not item.name.startswith('.'):
+                elif item.is_dir():
                     summary_parts.append(f"Dir: {item.name}/")
         except Exception:
             pass
@@ -259,7 +466,7 @@ Return only JSON with these keys."""
             if fw_path.exists():
                 summary_parts.append(f"Framework config: {fw_file}")
         
-        return "\n".join(summary_parts[:50])  # Limit to avoid token limits
+        return "\n".join(summary_parts[:FILE_SUMMARY_LIMIT])  # Limit to avoid token limits
     
     def _summarize_readme(self) -> str:
         """Create a summary of README content"""
@@ -288,36 +495,38 @@ Return only JSON with these keys."""
         if not self.readme_content:
             return "Unknown purpose"
         
-        # Simple heuristic based on README content
-        readme_lower = self.readme_content.lower()
-        
-        purposes = {
-            'web application': ['web', 'http', 'server', 'api'],
-            'library/package': ['library', 'package', 'sdk', 'module'],
-            'tool/utility': ['tool', 'utility', 'script', 'cli'],
-            'data analysis': ['data', 'analytics', 'machine learning', 'ml'],
-            'mobile app': ['mobile', 'ios', 'android'],
-            'game': ['game', 'gaming', 'play']
-        }
-        
-        for purpose, keywords in purposes.items():
-            if any(keyword in readme_lower for keyword in keywords):
-                return purpose
+        # Simple heuristic based on README content: one scan collects every keyword
+        # hit, and the highest-priority purpose among them wins
+        best = len(PURPOSES)
+        for match in _PURPOSE_RE.finditer(self._readme_lower):
+            best = min(best, _PURPOSE_RANK[match.group(1)])
+            if best == 0:
+                break
         
-        return "General software project"
+        return PURPOSES[best][0] if best < len(PURPOSES) else "General software project"
+    
+    def _count_dependencies(self) -> int:
+        """Total declared dependencies, including nested groups (node deps/devDeps, python extras)"""
+        total_deps = 0
+        for dep_list in self.dependencies.values():
+            if isinstance(dep_list, list):
+                total_deps += len(dep_list)
+            elif isinstance(dep_list, dict):
+                for sub_list in dep_list.values():
+                    if isinstance(sub_list, list):
+                        total_deps += len(sub_list)
+        return total_deps
     
     def _calculate_complexity(self) -> str:
         """Calculate project complexity score"""
         score = 0
         
-        # Count file types
-        total_files = 0
+        # Count files from the index the structure walk already built
         try:
-            for _ in self.repo_path.rglob("*"):
-                if Path(_).is_file():
-                    total_files += 1
+            self._walk_once()
         except Exception:
             pass
+        total_files = len(self._files['name'])
         
         if total_files > 100:
             score += 3
@@ -334,14 +543,7 @@ Return only JSON with these keys."""
             score += 1
         
         # Check dependency count
-        total_deps = 0
-        for dep_list in self.dependencies.values():
-            if isinstance(dep_list, list):
-                total_deps += len(dep_list)
-            elif isinstance(dep_list, dict):
-                for sub_list in dep_list.values():
-                    if isinstance(sub_list, list):
-                        total_deps += len(sub_list)
+        total_deps = self._count_dependencies()
         
         if total_deps > 50:
             score += 3
@@ -358,19 +560,43 @@ Return only JSON with these keys."""
         else:
             return "low"
 
-def analyze_repo(repo_path: Path, analysis_depth: str = "standard") -> Dict[str, Any]:
+def analyze_repo(repo_path: Path, analysis_depth: str = "standard",
+                 cache_stats: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
     """
     Analyze repository structure, dependencies, and purpose.
     
     Args:
         repo_path: Path to repository to analyze
         analysis_depth: "quick", "standard", or "deep" analysis
+        cache_stats: Optional counters; "hits"/"misses" are incremented per analysis cache lookup
         
     Returns:
         Dictionary containing comprehensive repository analysis
     """
     analyzer = RepositoryAnalysis(repo_path)
     
+    try:
+        fingerprint = analyzer._fingerprint(analysis_depth)
+    except Exception as e:
+        log_info(f"Could not fingerprint repository: {e}")
+        fingerprint = None
+    if not fingerprint:
+        return _run_analysis(analyzer, analysis_depth, None)
+    
+    with _analysis_locks_guard:
+        lock = _analysis_locks.setdefault(fingerprint, threading.Lock())
+    with lock:
+        cached = _load_cached_analysis(fingerprint)
+        if cache_stats is not None:
+            key = "hits" if cached is not None else "misses"
+            cache_stats[key] = cache_stats.get(key, 0) + 1
+        if cached is not None:
+            log_info(f"Repository analysis loaded from cache: {repo_path}")
+            return cached
+        return _run_analysis(analyzer, analysis_depth, fingerprint)
+
+def _run_analysis(analyzer: RepositoryAnalysis, analysis_depth: str,
+                  fingerprint: Optional[str]) -> Dict[str, Any]:
     if analysis_depth == "quick":
         # Quick analysis - just structure and basic info
         analyzer._analyze_structure()
@@ -389,5 +615,80 @@ def analyze_repo(repo_path: Path, analysis_depth: str = "standard") -> Dict[str,
         # Standard or deep analysis
         analyzer.analysis = analyzer.analyze()
     
-    log_info(f"Repository analysis completed: {repo_path}")
-    return analyzer.analysis
\ No newline at end of file
+    # a result missing its LLM insights is not worth keeping; the next run retries
+    if fingerprint and "error" not in analyzer.analysis and not analyzer.llm_failed:
+        _store_cached_analysis(fingerprint, analyzer.analysis)
+    
+    log_info(f"Repository analysis completed: {analyzer.repo_path}")
+    return analyzer.analysis
+
+def _load_cached_analysis(fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Return a stored analysis for this fingerprint, marking it most recently used"""
+    path = ANALYSIS_CACHE_DIR / f"analysis-{fingerprint}.json"
+    try:
+        analysis = orjson.loads(path.read_bytes())
+        os.utime(path)
+        return analysis
+    except (OSError, ValueError):
+        return None
+
+def _store_cached_analysis(fingerprint: str, analysis: Dict[str, Any]):
+    """Write an analysis atomically and keep only the newest ANALYSIS_CACHE_KEEP entries"""
+    cache_dir = ANALYSIS_CACHE_DIR
+    try:
+        # unique temp file per writer, so concurrent analyses of one tree can't clobber each other
+        _atomic_write(cache_dir / f"analysis-{fingerprint}.json",
+                      orjson.dumps(analysis, default=str, option=orjson.OPT_NON_STR_KEYS))
+        
+        entries = sorted(cache_dir.glob("analysis-*.json"), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+        for stale in entries[ANALYSIS_CACHE_KEEP:]:
+            stale.unlink(missing_ok=True)
+    except OSError as e:
+        log_info(f"Could not cache repository analysis: {e}")
+
+def analyze_repos(repo_paths: List[Path], max_workers: int = 4) -> List[Dict[str, Any]]:
+    """
+    Analyze several repositories, sharing a single LLM call across the batch.
+    
+    Args:
+        repo_paths: Paths to the repositories to analyze
+        max_workers: Threads used for the filesystem part of the analysis
+        
+    Returns:
+        One analysis dictionary per path, in the same order
+    """
+    analyzers = [RepositoryAnalysis(path) for path in repo_paths]
+    
+    def run_local(analyzer: RepositoryAnalysis) -> Optional[str]:
+        log_progress(f"Analyzing repository: {analyzer.repo_path}")
+        try:
+            analyzer._analyze_local()
+            return analyzer._llm_prompt()
+        except Exception as e:
+            log_info(f"Analysis failed: {e}")
+            analyzer.analysis = {"error": str(e)}
+            return None
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        prompts = list(pool.map(run_local, analyzers))
+    
+    ready = [i for i, prompt in enumerate(prompts) if prompt is not None]
+    try:
+        responses = cached_complete_batch([prompts[i] for i in ready])
+    except Exception as e:
+        log_info(f"LLM analysis failed: {e}")
+        responses = [""] * len(ready)
+    
+    for i, response in zip(ready, responses):
+        analyzer = analyzers[i]
+        try:
+            analyzer._apply_llm_response(response)
+        except Exception as e:
+            log_info(f"LLM analysis failed for {analyzer.repo_path}: {e}")
+        try:
+            analyzer._compile_analysis()
+        except Exception as e:
+            log_info(f"Analysis failed: {e}")
+            analyzer.analysis = {"error": str(e)}
+    
+    return [analyzer.analysis for analyzer in analyzers]
@@ -1,20 +1,105 @@
 # Cognitive API Integration Layer for Fern
 from __future__ import annotations
-import json
+import subprocess
+from collections import namedtuple
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List
 from datetime import datetime
+from functools import cache, cached_property
+import orjson
 from fern.cognitive.planner import plan_feature, FeaturePlan
 from fern.cognitive.analyzer import analyze_repo
 from fern.cognitive.detector import detect_changes, analyze_pull_request
 from fern.cognitive.prioritizer import prioritize_tasks, TaskItem
 
+# Section success flags and payloads pulled out of the results once, shared by the report builders
+ResultsView = namedtuple("ResultsView", [
+    "repo_ok", "repo_section", "repo_analysis",
+    "plan_ok", "plan_data",
+    "change_ok", "change_summary",
+    "task_ok", "task_data"
+])
+
+class CognitiveResults(Mapping):
+    """
+    Section results of a full cognitive analysis, plus the derived reports.
+    
+    The derived reports (overall_insights, cognitive_summary, workflow_recommendations)
+    are only built when first read, so callers that use the raw sections pay nothing
+    for them. Use to_dict() to get a plain, JSON-serializable dict.
+    """
+    DERIVED = ("overall_insights", "cognitive_summary", "workflow_recommendations")
+    
+    def __init__(self, api: CognitiveAPI, sections: Dict[str, Any]):
+        self._api = api
+        self._sections = sections
+    
+    @cached_property
+    def _view(self) -> ResultsView:
+        return self._api._walk_results(self._sections)
+    
+    @cached_property
+    def overall_insights(self) -> List[str]:
+        return self._api._generate_overall_insights(self._view)
+    
+    @cached_property
+    def cognitive_summary(self) -> str:
+        return self._api._create_cognitive_summary(self._view)
+    
+    @cached_property
+    def workflow_recommendations(self) -> List[str]:
+        return self._api._generate_workflow_recommendations(self._view)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self._sections:
+            return self._sections[key]
+        if key in self.DERIVED:
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def __iter__(self):
+        yield from self._sections
+        yield from self.DERIVED
+    
+    def __len__(self) -> int:
+        return len(self._sections) + len(self.DERIVED)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+    
+    def __repr__(self) -> str:
+        return f"CognitiveResults({self.to_dict()!r})"
+
+@cache
+def _has_git_python() -> bool:
+    """Whether GitPython (used by change detection) can be imported; checked once per process"""
+    try:
+        import git  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, CognitiveResults):
+        return obj.to_dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "to_dict"):
+        # FeaturePlan, CommitAnalysis, PullRequestAnalysis, ...
+        return obj.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
 class CognitiveAPI:
     """
     Unified API for all cognitive planning layer functions.
     Provides both functional interface and potential REST API foundation.
     """
     
+    # Per-session state (git probe, cache stats, request stamp) lives in session_data
+    __slots__ = ("repo_path", "session_data")
+    
     def __init__(self, repo_path: Optional[Path] = None):
         self.repo_path = repo_path
         self.session_data = {}
@@ -30,38 +115,7 @@ class CognitiveAPI:
         Returns:
             Structured feature plan with subtasks and metadata
         """
-        try:
-            # Use repository context if available
-            repo_context = self.repo_path if self.repo_path else None
-            
-            # Create feature plan
-            feature_plan = plan_feature(goal, repo_context, max_chars=20000)
-            
-            # Add context-based enhancements
-            if context:
-                feature_plan = self._enhance_plan_with_context(feature_plan, context)
-            
-            return {
-                "status": "success",
-                "function": "/plan_feature",
-                "timestamp": datetime.now().isoformat(),
-                "goal": goal,
-                "plan": feature_plan.to_dict(),
-                "metadata": {
-                    "subtask_count": len(feature_plan.subtasks),
-                    "estimated_total_effort": feature_plan.estimated_effort,
-                    "dependencies_count": len(feature_plan.dependencies),
-                    "risk_assessment": self._assess_plan_risk(feature_plan)
-                }
-            }
-            
-        except Exception as e:
-            return {
-                "status": "error",
-                "function": "/plan_feature",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
+        return self._run_endpoint("/plan_feature", self._plan_feature, goal, context)
     
     def analyze_repo_endpoint(self, analysis_depth: str = "standard") -> Dict[str, Any]:
         """
@@ -73,34 +127,7 @@ class CognitiveAPI:
         Returns:
             Comprehensive repository analysis
         """
-        try:
-            if not self.repo_path or not self.repo_path.exists():
-                return {
-                    "status": "error",
-                    "function": "/analyze_repo",
-                    "error": "Repository path not provided or does not exist",
-                    "timestamp": datetime.now().isoformat()
-                }
-            
-            analysis = analyze_repo(self.repo_path, analysis_depth)
-            
-            return {
-                "status": "success",
-                "function": "/analyze_repo",
-                "timestamp": datetime.now().isoformat(),
-                "repo_path": str(self.repo_path),
-                "analysis_depth": analysis_depth,
-                "analysis": analysis,
-                "insights": self._generate_repo_insights(analysis)
-            }
-            
-        except Exception as e:
-            return {
-                "status": "error",
-                "function": "/analyze_repo",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
+        return self._run_endpoint("/analyze_repo", self._analyze_repo, analysis_depth, requires_repo=True)
     
     def detect_changes_endpoint(self, base_ref: str = "HEAD~1", head_ref: str = "HEAD") -> Dict[str, Any]:
         """
@@ -113,34 +140,7 @@ class CognitiveAPI:
         Returns:
             Change analysis and PR-like summary
         """
-        try:
-            if not self.repo_path or not self.repo_path.exists():
-                return {
-                    "status": "error",
-                    "function": "/detect_changes",
-                    "error": "Repository path not provided or does not exist",
-                    "timestamp": datetime.now().isoformat()
-                }
-            
-            changes = detect_changes(self.repo_path, base_ref, head_ref)
-            
-            return {
-                "status": "success",
-                "function": "/detect_changes",
-                "timestamp": datetime.now().isoformat(),
-                "repo_path": str(self.repo_path),
-                "comparison": {"base": base_ref, "head": head_ref},
-                "analysis": changes,
-                "summary": self._generate_change_summary(changes)
-            }
-            
-        except Exception as e:
-            return {
-                "status": "error",
-                "function": "/detect_changes",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
+        return self._run_endpoint("/detect_changes", self._detect_changes, base_ref, head_ref, requires_repo=True)
     
     def prioritize_tasks_endpoint(self, tasks_data: Any, 
                                  strategy: str = "balanced",
@@ -156,34 +156,103 @@ class CognitiveAPI:
         Returns:
             Prioritized tasks with recommendations
         """
-        try:
-            prioritization = prioritize_tasks(
-                tasks_data=tasks_data,
-                strategy=strategy,
-                repo_path=self.repo_path,
-                constraints=constraints
-            )
-            
-            return {
-                "status": "success",
-                "function": "/prioritize_tasks",
-                "timestamp": datetime.now().isoformat(),
-                "strategy": strategy,
-                "results": prioritization,
-                "recommendations": self._generate_prioritization_recommendations(prioritization)
-            }
+        return self._run_endpoint("/prioritize_tasks", self._prioritize_tasks, tasks_data, strategy, constraints)
+    
+    def _run_endpoint(self, function: str, handler: Callable[..., Dict[str, Any]], *args: Any,
+                      requires_repo: bool = False) -> Dict[str, Any]:
+        """
+        Shared endpoint scaffolding: repository check, response envelope and error mapping.
+        
+        Args:
+            function: Endpoint name reported in the response
+            handler: Produces the endpoint-specific response fields
+            *args: Passed through to handler
+            requires_repo: Fail early unless repo_path exists
             
+        Returns:
+            Success envelope merged with the handler's fields, or the error shape
+        """
+        timestamp = self._timestamp()
+        try:
+            if requires_repo and (not self.repo_path or not self.repo_path.exists()):
+                raise ValueError("Repository path not provided or does not exist")
+            response = {"status": "success", "function": function, "timestamp": timestamp}
+            response.update(handler(*args))
+            return response
         except Exception as e:
-            return {
-                "status": "error",
-                "function": "/prioritize_tasks",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
+            return {"status": "error", "function": function, "error": str(e), "timestamp": timestamp}
+    
+    def _plan_feature(self, goal: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # Use repository context if available
+        repo_context = self.repo_path if self.repo_path else None
+        
+        # Create feature plan
+        feature_plan = plan_feature(goal, repo_context, max_chars=20000)
+        
+        # Add context-based enhancements
+        if context:
+            feature_plan = self._enhance_plan_with_context(feature_plan, context)
+        
+        return {
+            "goal": goal,
+            "plan": feature_plan.to_dict(),
+            "metadata": {
+                "subtask_count": len(feature_plan.subtasks),
+                "estimated_total_effort": feature_plan.estimated_effort,
+                "dependencies_count": len(feature_plan.dependencies),
+                "risk_assessment": self._assess_plan_risk(feature_plan)
             }
+        }
+    
+    def _analyze_repo(self, analysis_depth: str) -> Dict[str, Any]:
+        # analyze_repo serves unchanged trees from its fingerprint-keyed disk cache
+        cache_stats = self.session_data.setdefault("cache_stats", {"hits": 0, "misses": 0})
+        analysis = analyze_repo(self.repo_path, analysis_depth, cache_stats=cache_stats)
+        
+        return {
+            "repo_path": str(self.repo_path),
+            "analysis_depth": analysis_depth,
+            "analysis": analysis,
+            "insights": self._generate_repo_insights(analysis)
+        }
+    
+    def _detect_changes(self, base_ref: str, head_ref: str) -> Dict[str, Any]:
+        git = self._git_probe()
+        if git and self._refs_identical(git["toplevel"], base_ref, head_ref):
+            # Nothing to analyze; skip commit loading, diff parsing and the LLM summary
+            changes = {
+                "diff_summary": {"files_changed": [], "additions": 0, "deletions": 0, "lines_changed": 0},
+                "comparison_refs": {"base": base_ref, "head": head_ref}
+            }
+        else:
+            changes = detect_changes(self.repo_path, base_ref, head_ref,
+                                     git_root=Path(git["toplevel"]) if git else None)
+        
+        return {
+            "repo_path": str(self.repo_path),
+            "comparison": {"base": base_ref, "head": head_ref},
+            "analysis": changes,
+            "summary": self._generate_change_summary(changes)
+        }
+    
+    def _prioritize_tasks(self, tasks_data: Any, strategy: str,
+                          constraints: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        prioritization = prioritize_tasks(
+            tasks_data=tasks_data,
+            strategy=strategy,
+            repo_path=self.repo_path,
+            constraints=constraints
+        )
+        
+        return {
+            "strategy": strategy,
+            "results": prioritization,
+            "recommendations": self._generate_prioritization_recommendations(prioritization)
+        }
     
     def full_cognitive_analysis(self, goal: Optional[str] = None,
                               tasks_data: Optional[Any] = None,
-                              strategy: str = "balanced") -> Dict[str, Any]:
+                              strategy: str = "balanced", lazy: bool = False) -> Dict[str, Any]:
         """
         Perform complete cognitive analysis workflow
         
@@ -191,59 +260,122 @@ class CognitiveAPI:
             goal: Optional feature goal for planning
             tasks_data: Optional tasks for prioritization
             strategy: Prioritization strategy
+            lazy: Return "cognitive_analysis" as a CognitiveResults mapping whose derived
+                reports are built on first access (serialize it with to_json) instead
+                of a plain dict
             
         Returns:
             Complete cognitive analysis report
         """
-        results = {}
-        
-        # Repository analysis (if repo available)
-        if self.repo_path and self.repo_path.exists():
-            repo_analysis = self.analyze_repo_endpoint("standard")
-            results["repository_analysis"] = repo_analysis
-        else:
-            results["repository_analysis"] = {"status": "skipped", "reason": "No repository path"}
-        
-        # Feature planning (if goal provided)
-        if goal:
-            feature_plan = self.plan_feature_endpoint(goal, 
-                                                    context={"repo_analysis": results.get("repository_analysis", {}).get("analysis")})
-            results["feature_planning"] = feature_plan
-        else:
-            results["feature_planning"] = {"status": "skipped", "reason": "No goal provided"}
-        
-        # Change detection (if git repo available)
-        if self.repo_path and self.repo_path.exists():
-            try:
-                from git import Repo
-                if (self.repo_path / ".git").exists():
-                    change_analysis = self.detect_changes_endpoint()
-                    results["change_analysis"] = change_analysis
+        # every section response of this request carries the same stamp
+        self.session_data["_ts"] = datetime.now().isoformat()
+        try:
+            results = {}
+            has_repo = bool(self.repo_path and self.repo_path.exists())
+            
+            # Repository analysis, change detection and prioritization run concurrently; the
+            # prioritizer's own analyze_repo() call waits on the one in flight for this tree
+            # and reads its cached result. Feature planning waits on the repo analysis.
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                repo_future = pool.submit(self.analyze_repo_endpoint, "standard") if has_repo else None
+                changes_future = pool.submit(self._detect_changes_if_git) if has_repo else None
+                tasks_future = pool.submit(self.prioritize_tasks_endpoint, tasks_data, strategy) if tasks_data else None
+            
+                # Repository analysis (if repo available)
+                if repo_future:
+                    results["repository_analysis"] = self._future_result(repo_future, "/analyze_repo")
                 else:
-                    results["change_analysis"] = {"status": "skipped", "reason": "Not a git repository"}
-            except Exception as e:
-                results["change_analysis"] = {"status": "error", "error": str(e)}
-        else:
-            results["change_analysis"] = {"status": "skipped", "reason": "No repository path"}
-        
-        # Task prioritization (if tasks provided)
-        if tasks_data:
-            task_prioritization = self.prioritize_tasks_endpoint(tasks_data, strategy)
-            results["task_prioritization"] = task_prioritization
-        else:
-            results["task_prioritization"] = {"status": "skipped", "reason": "No tasks provided"}
-        
-        # Generate overall insights
-        results["overall_insights"] = self._generate_overall_insights(results)
-        results["cognitive_summary"] = self._create_cognitive_summary(results)
-        results["workflow_recommendations"] = self._generate_workflow_recommendations(results)
-        
-        return {
-            "status": "success",
-            "timestamp": datetime.now().isoformat(),
-            "cognitive_analysis": results,
-            "api_version": "1.0"
-        }
+                    results["repository_analysis"] = {"status": "skipped", "reason": "No repository path"}
+            
+                # Feature planning (if goal provided)
+                if goal:
+                    feature_plan = self.plan_feature_endpoint(goal, 
+                                                            context={"repo_analysis": results.get("repository_analysis", {}).get("analysis")})
+                    results["feature_planning"] = feature_plan
+                else:
+                    results["feature_planning"] = {"status": "skipped", "reason": "No goal provided"}
+            
+                # Change detection (if git repo available)
+                if changes_future:
+                    results["change_analysis"] = self._future_result(changes_future, "/detect_changes")
+                else:
+                    results["change_analysis"] = {"status": "skipped", "reason": "No repository path"}
+            
+                # Task prioritization (if tasks provided)
+                if tasks_future:
+                    results["task_prioritization"] = self._future_result(tasks_future, "/prioritize_tasks")
+                else:
+                    results["task_prioritization"] = {"status": "skipped", "reason": "No tasks provided"}
+            
+            analysis = CognitiveResults(self, results)
+            return {
+                "status": "success",
+                "timestamp": self._timestamp(),
+                "cognitive_analysis": analysis if lazy else analysis.to_dict(),
+                "api_version": "1.0"
+            }
+        finally:
+            self.session_data.pop("_ts", None)
+    
+    def to_json(self, obj: Any) -> bytes:
+        """Serialize an endpoint response (including lazy CognitiveResults) to JSON bytes"""
+        return orjson.dumps(obj, default=_json_default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    
+    def _timestamp(self) -> str:
+        """Shared stamp while a full analysis is running, otherwise the current time"""
+        return self.session_data.get("_ts") or datetime.now().isoformat()
+    
+    def _detect_changes_if_git(self) -> Dict[str, Any]:
+        """Run change detection when the repository is a git checkout"""
+        try:
+            if not _has_git_python():
+                return {"status": "error", "error": "GitPython is not installed"}
+            if self._git_probe():
+                return self.detect_changes_endpoint()
+            return {"status": "skipped", "reason": "Not a git repository"}
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+    
+    def _git_probe(self) -> Optional[Dict[str, str]]:
+        """Locate the enclosing git work tree with a single rev-parse call (cached per session)"""
+        if "git" not in self.session_data:
+            probe = None
+            try:
+                proc = subprocess.run(
+                    ["git", "-C", str(self.repo_path), "rev-parse",
+                     "--show-toplevel", "--git-common-dir", "--is-inside-work-tree"],
+                    capture_output=True, text=True, timeout=30
+                )
+                lines = proc.stdout.splitlines()
+                if proc.returncode == 0 and len(lines) == 3 and lines[2] == "true":
+                    probe = {"toplevel": lines[0], "common_dir": lines[1]}
+            except (OSError, subprocess.SubprocessError):
+                pass
+            self.session_data["git"] = probe
+        return self.session_data["git"]
+    
+    def _refs_identical(self, git_root: str, base_ref: str, head_ref: str) -> bool:
+        """True when `git diff --quiet` finds no difference (it exits on the first one)"""
+        try:
+            proc = subprocess.run(["git", "-C", git_root, "diff", "--quiet", base_ref, head_ref, "--"],
+                                  capture_output=True, timeout=30)
+        except (OSError, subprocess.SubprocessError):
+            return False
+        # 1 means "differs"; anything else (e.g. a bad ref) is left to detect_changes to report
+        return proc.returncode == 0
+    
+    def _future_result(self, future: Future, function: str) -> Dict[str, Any]:
+        """Unwrap a concurrent endpoint call, mapping any escaped exception to the error shape"""
+        try:
+            return future.result()
+        except Exception as e:
+            return {
+                "status": "error",
+                "function": function,
+                "error": str(e),
+                "timestamp": self._timestamp()
+            }
     
     def _enhance_plan_with_context(self, plan: FeaturePlan, context: Dict[str, Any]) -> FeaturePlan:
         """Enhance feature plan with additional context"""
@@ -253,10 +385,14 @@ class CognitiveAPI:
     
     def _assess_plan_risk(self, plan: FeaturePlan) -> Dict[str, str]:
         """Assess risk level of a feature plan"""
-        total_risk = sum(task.estimated_effort for task in plan.subtasks if hasattr(task, 'risk_level') and task.risk_level == 'high')
         complexity = len(plan.subtasks)
+        if complexity > 15:
+            return {"level": "high", "reason": "Complex plan with high-risk components"}
         
-        if total_risk > 10 or complexity > 15:
+        # Subtask always carries risk_level, so no hasattr probe per task
+        total_risk = sum(task.estimated_effort for task in plan.subtasks if task.risk_level == 'high')
+        
+        if total_risk > 10:
             return {"level": "high", "reason": "Complex plan with high-risk components"}
         elif total_risk > 5 or complexity > 8:
             return {"level": "medium", "reason": "Moderate complexity with some risk"}
@@ -278,7 +414,10 @@ class CognitiveAPI:
         
         deps = analysis.get('dependencies', {})
         if deps:
-            total_deps = sum(len(d) if isinstance(d, list) else 1 for d in deps.values())
+            # Counted once by the analyzer (and cached with it); quick analyses don't carry it
+            total_deps = analysis.get('dependency_count')
+            if total_deps is None:
+                total_deps = sum(len(d) if isinstance(d, list) else 1 for d in deps.values())
             insights.append(f"Total dependencies: {total_deps}")
         
         return insights
@@ -296,7 +435,11 @@ class CognitiveAPI:
             "lines_added": diff_summary.get('additions', 0),
             "lines_removed": diff_summary.get('deletions', 0),
             "impact_level": commit_analysis.get('impact_score', 0),
-            "change_categories": list(set(ch.get('change_type') for ch in commit_analysis.get('changes', [])))
+            # ordered dedup, so identical change sets always summarize identically
+            "change_categories": list(dict.fromkeys(
+                change_type for ch in commit_analysis.get('changes', [])
+                if (change_type := ch.get('change_type')) is not None
+            ))
         }
     
     def _generate_prioritization_recommendations(self, prioritization: Dict[str, Any]) -> List[str]:
@@ -315,39 +458,50 @@ class CognitiveAPI:
         
         return recommendations
     
-    def _generate_overall_insights(self, results: Dict[str, Any]) -> List[str]:
+    def _walk_results(self, results: Dict[str, Any]) -> ResultsView:
+        """Destructure the four section results once for all report builders"""
+        repo_section = results.get('repository_analysis', {})
+        feature_plan = results.get('feature_planning', {})
+        change_analysis = results.get('change_analysis', {})
+        task_prioritization = results.get('task_prioritization', {})
+        return ResultsView(
+            repo_ok=repo_section.get('status') == 'success',
+            repo_section=repo_section,
+            repo_analysis=repo_section.get('analysis', {}),
+            plan_ok=feature_plan.get('status') == 'success',
+            plan_data=feature_plan.get('plan', {}),
+            change_ok=change_analysis.get('status') == 'success',
+            change_summary=change_analysis.get('summary', {}),
+            task_ok=task_prioritization.get('status') == 'success',
+            task_data=task_prioritization
+        )
+    
+    def _generate_overall_insights(self, view: ResultsView) -> List[str]:
         """Generate overall insights from complete analysis"""
         insights = []
         
         # Repository insights
-        repo_analysis = results.get('repository_analysis', {})
-        if repo_analysis.get('status') == 'success':
-            analysis = repo_analysis.get('analysis', {})
-            insights.extend(repo_analysis.get('insights', []))
+        if view.repo_ok:
+            insights.extend(view.repo_section.get('insights', []))
         
         # Feature planning insights
-        feature_plan = results.get('feature_planning', {})
-        if feature_plan.get('status') == 'success':
-            plan_data = feature_plan.get('plan', {})
-            insights.append(f"Feature plan created with {plan_data.get('subtask_count', 0)} subtasks")
+        if view.plan_ok:
+            insights.append(f"Feature plan created with {view.plan_data.get('subtask_count', 0)} subtasks")
         
         # Change analysis insights
-        change_analysis = results.get('change_analysis', {})
-        if change_analysis.get('status') == 'success':
-            summary = change_analysis.get('summary', {})
-            if summary.get('files_modified', 0) > 0:
-                insights.append(f"Detected {summary['files_modified']} modified files")
+        if view.change_ok:
+            if view.change_summary.get('files_modified', 0) > 0:
+                insights.append(f"Detected {view.change_summary['files_modified']} modified files")
         
         # Task prioritization insights
-        task_prioritization = results.get('task_prioritization', {})
-        if task_prioritization.get('status') == 'success':
-            high_priority = task_prioritization.get('high_priority', 0)
+        if view.task_ok:
+            high_priority = view.task_data.get('high_priority', 0)
             if high_priority > 0:
                 insights.append(f"{high_priority} high-priority tasks identified")
         
         return insights
     
-    def _create_cognitive_summary(self, results: Dict[str, Any]) -> str:
+    def _create_cognitive_summary(self, view: ResultsView) -> str:
         """Create a narrative summary of the cognitive analysis"""
         summary_parts = []
         
@@ -355,48 +509,39 @@ class CognitiveAPI:
         summary_parts.append("=" * 30)
         
         # Repository summary
-        repo_analysis = results.get('repository_analysis', {})
-        if repo_analysis.get('status') == 'success':
-            analysis = repo_analysis.get('analysis', {})
-            project_type = analysis.get('project_type', 'unknown')
-            complexity = analysis.get('complexity_score', 'unknown')
+        if view.repo_ok:
+            project_type = view.repo_analysis.get('project_type', 'unknown')
+            complexity = view.repo_analysis.get('complexity_score', 'unknown')
             summary_parts.append(f"Repository: {project_type} project with {complexity} complexity")
         else:
             summary_parts.append("Repository: No analysis performed")
         
         # Feature planning summary
-        feature_plan = results.get('feature_planning', {})
-        if feature_plan.get('status') == 'success':
-            plan_data = feature_plan.get('plan', {})
-            subtask_count = plan_data.get('subtask_count', 0)
-            effort = plan_data.get('estimated_total_effort', 0)
+        if view.plan_ok:
+            subtask_count = view.plan_data.get('subtask_count', 0)
+            effort = view.plan_data.get('estimated_total_effort', 0)
             summary_parts.append(f"Feature Plan: {subtask_count} subtasks, estimated effort: {effort}")
         
         # Change analysis summary
-        change_analysis = results.get('change_analysis', {})
-        if change_analysis.get('status') == 'success':
-            summary = change_analysis.get('summary', {})
-            files = summary.get('files_modified', 0)
+        if view.change_ok:
+            files = view.change_summary.get('files_modified', 0)
             summary_parts.append(f"Changes: {files} files modified")
         
         # Task prioritization summary
-        task_prioritization = results.get('task_prioritization', {})
-        if task_prioritization.get('status') == 'success':
-            high_pri = task_prioritization.get('high_priority', 0)
-            total_tasks = task_prioritization.get('total_tasks', 0)
+        if view.task_ok:
+            high_pri = view.task_data.get('high_priority', 0)
+            total_tasks = view.task_data.get('total_tasks', 0)
             summary_parts.append(f"Tasks: {total_tasks} total, {high_pri} high priority")
         
-        return "\\n".join(summary_parts)
+        return "\n".join(summary_parts)
     
-    def _generate_workflow_recommendations(self, results: Dict[str, Any]) -> List[str]:
+    def _generate_workflow_recommendations(self, view: ResultsView) -> List[str]:
         """Generate workflow recommendations based on analysis"""
         recommendations = []
         
         # Repository-based recommendations
-        repo_analysis = results.get('repository_analysis', {})
-        if repo_analysis.get('status') == 'success':
-            analysis = repo_analysis.get('analysis', {})
-            complexity = analysis.get('complexity_score', 'low')
+        if view.repo_ok:
+            complexity = view.repo_analysis.get('complexity_score', 'low')
             
             if complexity == 'high':
                 recommendations.append("High complexity project - consider implementing automated testing and CI/CD")
@@ -404,18 +549,15 @@ class CognitiveAPI:
                 recommendations.append("Medium complexity - ensure adequate documentation and code reviews")
         
         # Feature planning recommendations
-        feature_plan = results.get('feature_planning', {})
-        if feature_plan.get('status') == 'success':
-            plan_data = feature_plan.get('plan', {})
-            subtask_count = plan_data.get('subtask_count', 0)
+        if view.plan_ok:
+            subtask_count = view.plan_data.get('subtask_count', 0)
             
             if subtask_count > 10:
                 recommendations.append("Complex feature - break into smaller milestones for better progress tracking")
         
         # Task prioritization recommendations
-        task_prioritization = results.get('task_prioritization', {})
-        if task_prioritization.get('status') == 'success':
-            strategy = task_prioritization.get('strategy', 'balanced')
+        if view.task_ok:
+            strategy = view.task_data.get('strategy', 'balanced')
             recommendations.append(f"Applied {strategy} prioritization strategy")
         
         return recommendations
@@ -1,15 +1,60 @@
 # Change Detection and Analysis - Cognitive Layer
 from __future__ import annotations
-import json
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from fern.tools.git import Repo
-from fern.tools.llm import complete
+from fern.tools.llm import system_prompt
+from fern.tools.llm_cache import cached_complete, evict
 from fern.tools.logger import log_info, log_progress
 
+# Control characters stripped from LLM output
+_CTRL_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+
+PR_SUMMARY_SYS = system_prompt("You are a professional code reviewer writing PR descriptions.")
+
+# Changed-file categorization: one extension lookup, with path keywords
+# deciding whether source files are really tests or docs
+_EXT_CATEGORY = {
+    **dict.fromkeys(['.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs'], 'source_code'),
+    **dict.fromkeys(['.json', '.yaml', '.yml', '.conf', '.ini', '.cfg', '.toml'], 'config'),
+    **dict.fromkeys(['.dockerfile', '.gradle'], 'build'),
+    **dict.fromkeys(['.css', '.scss', '.less'], 'style'),
+    **dict.fromkeys(['.md', '.rst'], 'docs'),
+}
+_BUILD_FILES = dict.fromkeys(
+    ['dockerfile', 'makefile', 'pom.xml', 'docker-compose.yml', 'docker-compose.yaml'], 'build')
+# plain substring checks, as before: "testing/", "FooTest.java" and "conftest.py" all count
+_TEST_PATH_RE = re.compile(r'test|spec')
+_DOCS_PATH_RE = re.compile(r'docs|readme')
+
+# Base impact score per change type
+CHANGE_TYPE_SCORES = {
+    'feature': 5,
+    'bugfix': 3,
+    'refactor': 2,
+    'docs': 1,
+    'style': 1,
+    'config': 2,
+    'test': 1,
+    'chore': 1
+}
+
+# (change type, semantic impact) for every category but source_code
+CATEGORY_CHANGE_TYPES = {
+    'tests': ('test', 'low'),
+    'docs': ('docs', 'low'),
+    'config': ('config', 'moderate'),
+    'build': ('chore', 'moderate'),
+    'style': ('style', 'minimal')
+}
+
 class ChangeSet:
+    __slots__ = ("files_changed", "additions", "deletions", "change_type", "semantic_impact")
+    
     def __init__(self, files_changed: List[str], additions: int, deletions: int, 
                  change_type: str, semantic_impact: str):
         self.files_changed = files_changed
@@ -28,12 +73,16 @@ class ChangeSet:
         }
 
 class CommitAnalysis:
+    __slots__ = ("commit_hash", "author", "message", "timestamp", "timestamp_iso",
+                 "changes", "impact_score")
+    
     def __init__(self, commit_hash: str, author: str, message: str, 
                  timestamp: datetime, changes: List[ChangeSet]):
         self.commit_hash = commit_hash
         self.author = author
         self.message = message
         self.timestamp = timestamp
+        self.timestamp_iso = timestamp.isoformat()
         self.changes = changes
         self.impact_score = self._calculate_impact_score()
         
@@ -41,20 +90,8 @@ class CommitAnalysis:
         """Calculate impact score based on change type and scope"""
         score = 0
         
-        # Base score for change types
-        change_scores = {
-            'feature': 5,
-            'bugfix': 3,
-            'refactor': 2,
-            'docs': 1,
-            'style': 1,
-            'config': 2,
-            'test': 1,
-            'chore': 1
-        }
-        
         for change in self.changes:
-            score += change_scores.get(change.change_type, 1)
+            score += CHANGE_TYPE_SCORES.get(change.change_type, 1)
             # Add weight for number of files
             score += min(len(change.files_changed), 5)
             # Add weight for size of changes
@@ -67,12 +104,15 @@ class CommitAnalysis:
             "commit_hash": self.commit_hash,
             "author": self.author,
             "message": self.message,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self.timestamp_iso,
             "impact_score": self.impact_score,
             "changes": [change.to_dict() for change in self.changes]
         }
 
 class PullRequestAnalysis:
+    __slots__ = ("pr_number", "title", "author", "branch", "base_branch", "commits",
+                 "description", "labels", "total_impact_score", "overall_impact", "review_status")
+    
     def __init__(self, pr_number: int, title: str, author: str, 
                  branch: str, base_branch: str, commits: List[CommitAnalysis],
                  description: str = "", labels: List[str] = None):
@@ -84,13 +124,17 @@ class PullRequestAnalysis:
         self.commits = commits
         self.description = description
         self.labels = labels or []
+        self.total_impact_score = 0
         self.overall_impact = self._calculate_overall_impact()
         self.review_status = "pending"
         
     def _calculate_overall_impact(self) -> str:
         """Calculate overall impact across all commits"""
-        total_impact = sum(commit.impact_score for commit in self.commits)
-        high_impact_count = sum(1 for commit in self.commits if commit.impact_score > 15)
+        total_impact = high_impact_count = 0
+        for commit in self.commits:
+            total_impact += commit.impact_score
+            high_impact_count += commit.impact_score > 15
+        self.total_impact_score = total_impact
         
         if total_impact > 50 or high_impact_count >= 2:
             return "high"
@@ -111,11 +155,12 @@ class PullRequestAnalysis:
             "overall_impact": self.overall_impact,
             "review_status": self.review_status,
             "commit_count": len(self.commits),
-            "total_impact_score": sum(commit.impact_score for commit in self.commits),
+            "total_impact_score": self.total_impact_score,
             "commits": [commit.to_dict() for commit in self.commits]
         }
 
-def detect_changes(repo_path: Path, base_ref: str = "HEAD~1", head_ref: str = "HEAD") -> Dict[str, Any]:
+def detect_changes(repo_path: Path, base_ref: str = "HEAD~1", head_ref: str = "HEAD",
+                   git_root: Optional[Path] = None, no_cache: bool = False) -> Dict[str, Any]:
     """
     Analyze changes between commits and provide PR-like review summary.
     
@@ -123,6 +168,8 @@ def detect_changes(repo_path: Path, base_ref: str = "HEAD~1", head_ref: str = "H
         repo_path: Path to git repository
         base_ref: Starting commit/branch for comparison
         head_ref: Ending commit/branch for comparison
+        git_root: Work tree root if the caller already resolved it (skips discovery)
+        no_cache: Always ask the LLM for the PR summary instead of reusing a cached one
         
     Returns:
         Dictionary containing change analysis and PR-like summary
@@ -130,7 +177,7 @@ def detect_changes(repo_path: Path, base_ref: str = "HEAD~1", head_ref: str = "H
     log_progress(f"Detecting changes from {base_ref} to {head_ref}")
     
     try:
-        repo = Repo(repo_path)
+        repo = Repo(git_root or repo_path)
         
         # Get commit objects
         base_commit = repo.commit(base_ref)
@@ -139,43 +186,17 @@ def detect_changes(repo_path: Path, base_ref: str = "HEAD~1", head_ref: str = "H
         if not base_commit or not head_commit:
             return {"error": f"Could not find commits {base_ref} or {head_ref}"}
         
-        # Get diff between commits
-        diff = repo.git.diff(base_ref, head_ref)
-        
-        # Parse changed files
-        changed_files = []
-        additions = 0
-        deletions = 0
-        
-        for line in diff.split('\n'):
-            if line.startswith('diff --git'):
-                # Extract file path
-                match = re.search(r'b/(.+)', line)
-                if match:
-                    changed_files.append(match.group(1))
-            elif line.startswith('+++'):
-                continue
-            elif line.startswith('@@'):
-                continue
-            elif line.startswith('+') and not line.startswith('+++'):
-                additions += 1
-            elif line.startswith('-') and not line.startswith('---'):
-                deletions += 1
+        # Per-file line counts straight from git (no patch text to parse)
+        file_stats = _numstat(repo, base_ref, head_ref)
+        changed_files = list(file_stats)
+        additions = sum(added for added, _ in file_stats.values())
+        deletions = sum(deleted for _, deleted in file_stats.values())
         
         # Analyze change types and semantic impact
-        changesets = _analyze_change_semantics(changed_files, diff)
-        
-        # Create commit analysis
-        commit_analysis = CommitAnalysis(
-            commit_hash=head_commit.hexsha[:8],
-            author=head_commit.author.name,
-            message=head_commit.message.strip(),
-            timestamp=datetime.fromtimestamp(head_commit.committed_date),
-            changes=changesets
-        )
+        commit_analysis = _commit_analysis(head_commit, file_stats, _added_paths(repo, base_ref, head_ref))
         
         # Generate PR-like summary
-        summary = _generate_pr_summary(commit_analysis, diff)
+        summary = _generate_pr_summary(commit_analysis, no_cache=no_cache)
         
         return {
             "commit_analysis": commit_analysis.to_dict(),
@@ -196,7 +217,63 @@ def detect_changes(repo_path: Path, base_ref: str = "HEAD~1", head_ref: str = "H
         log_info(f"Change detection failed: {e}")
         return {"error": str(e)}
 
-def _analyze_change_semantics(changed_files: List[str], diff: str) -> List[ChangeSet]:
+def _commit_analysis(commit, file_stats: Dict[str, Tuple[int, int]],
+                     added: frozenset[str]) -> CommitAnalysis:
+    """Build a CommitAnalysis for `commit` from per-file (additions, deletions) counts"""
+    return CommitAnalysis(
+        commit_hash=commit.hexsha[:8],
+        author=commit.author.name,
+        message=commit.message.strip(),
+        timestamp=datetime.fromtimestamp(commit.committed_date),
+        changes=_analyze_change_semantics(list(file_stats), file_stats, added)
+    )
+
+def _numstat(repo: Repo, base_ref: str, head_ref: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Map each changed path to its (additions, deletions) between two refs.
+    
+    Uses one `git diff --numstat -z` call; binary files count as 0/0 and renames
+    are reported under their new path.
+    """
+    return _parse_numstat(repo.git.diff('--numstat', '-z', base_ref, head_ref))
+
+def _parse_numstat(out: str) -> Dict[str, Tuple[int, int]]:
+    """Parse `--numstat -z` records into {path: (additions, deletions)}"""
+    stats: Dict[str, Tuple[int, int]] = {}
+    fields = iter(out.split('\0'))
+    for field in fields:
+        if not field:
+            continue
+        added, deleted, path = field.split('\t', 2)
+        if not path:
+            # rename/copy: the old and new paths follow as separate fields
+            next(fields, None)
+            path = next(fields, '')
+        stats[path] = (int(added) if added != '-' else 0, int(deleted) if deleted != '-' else 0)
+    return stats
+
+def _added_paths(repo: Repo, base_ref: str, head_ref: str) -> frozenset[str]:
+    """Paths that exist in head_ref but not in base_ref, from one `git diff --diff-filter=A`"""
+    out = repo.git.diff('--name-only', '--diff-filter=A', '-z', base_ref, head_ref)
+    return frozenset(filter(None, out.split('\0')))
+
+def _log_by_commit(repo: Repo, rev_range: str, *args: str) -> Dict[str, str]:
+    """
+    Run one `git log -z` over rev_range and split its per-commit output by hash.
+    
+    Each commit is diffed against its first parent (root commits against the
+    empty tree), so a whole PR costs one git process instead of one per commit.
+    """
+    out = repo.git.log('-z', '--diff-merges=first-parent', '--format=%x01%H', *args, rev_range)
+    by_commit = {}
+    for chunk in out.split('\x01'):
+        sha, _, body = chunk.partition('\0')
+        if sha:
+            by_commit[sha] = body.lstrip('\n')
+    return by_commit
+
+def _analyze_change_semantics(changed_files: List[str], file_stats: Dict[str, Tuple[int, int]],
+                              added: frozenset[str] = frozenset()) -> List[ChangeSet]:
     """Analyze the semantic meaning of changes"""
     changesets = []
     
@@ -212,22 +289,15 @@ def _analyze_change_semantics(changed_files: List[str], diff: str) -> List[Chang
     
     for file_path in changed_files:
         file_lower = file_path.lower()
+        name = file_lower.rpartition('/')[2]
         
-        if any(ext in file_lower for ext in ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs']):
-            if 'test' in file_lower or 'spec' in file_lower:
-                file_categories['tests'].append(file_path)
-            elif 'docs' in file_lower or 'readme' in file_lower or file_lower.endswith('.md'):
-                file_categories['docs'].append(file_path)
-            else:
-                file_categories['source_code'].append(file_path)
-        elif any(ext in file_lower for ext in ['.json', '.yaml', '.yml', '.conf', '.ini', '.cfg']):
-            file_categories['config'].append(file_path)
-        elif any(ext in file_lower for ext in ['.dockerfile', 'docker-compose', 'makefile', '.gradle', 'pom.xml']):
-            file_categories['build'].append(file_path)
-        elif any(ext in file_lower for ext in ['.css', '.scss', '.less']):
-            file_categories['style'].append(file_path)
-        else:
-            file_categories['source_code'].append(file_path)
+        category = _BUILD_FILES.get(name) or _EXT_CATEGORY.get(os.path.splitext(name)[1], 'source_code')
+        if category == 'source_code':
+            if _TEST_PATH_RE.search(file_lower):
+                category = 'tests'
+            elif _DOCS_PATH_RE.search(file_lower):
+                category = 'docs'
+        file_categories[category].append(file_path)
     
     # Analyze each category
     for category, files in file_categories.items():
@@ -235,18 +305,11 @@ def _analyze_change_semantics(changed_files: List[str], diff: str) -> List[Chang
             continue
             
         # Count lines changed for this category
-        category_diff = ""
-        for file_path in files:
-            pattern = f'\\+\\+\\+ b/{re.escape(file_path)}.*?(?=\\ndiff --git|$)'
-            matches = re.findall(pattern, diff, re.DOTALL)
-            if matches:
-                category_diff += "\\n".join(matches)
-        
-        additions = len(re.findall(r'^\\+', category_diff, re.MULTILINE))
-        deletions = len(re.findall(r'^-', category_diff, re.MULTILINE))
+        additions = sum(file_stats[f][0] for f in files)
+        deletions = sum(file_stats[f][1] for f in files)
         
         # Determine change type and semantic impact
-        change_type, semantic_impact = _classify_change_type(category, files)
+        change_type, semantic_impact = _classify_change_type(category, files, added)
         
         changesets.append(ChangeSet(
             files_changed=files,
@@ -258,53 +321,32 @@ def _analyze_change_semantics(changed_files: List[str], diff: str) -> List[Chang
     
     return changesets
 
-def _classify_change_type(category: str, files: List[str]) -> Tuple[str, str]:
+def _classify_change_type(category: str, files: List[str],
+                          added: frozenset[str] = frozenset()) -> Tuple[str, str]:
     """Classify change type and semantic impact"""
-    
     if category == 'source_code':
-        # Check for new files vs modifications
-        new_files = [f for f in files if not (Path(f).parent / f).exists() or f.endswith('.new')]
-        if new_files:
+        # New files make it a feature; edits to existing ones a refactor
+        if any(f in added or f.endswith('.new') for f in files):
             return 'feature', 'significant'
-        else:
-            return 'refactor', 'moderate'
-    
-    elif category == 'tests':
-        return 'test', 'low'
-    
-    elif category == 'docs':
-        return 'docs', 'low'
-    
-    elif category == 'config':
-        return 'config', 'moderate'
-    
-    elif category == 'build':
-        return 'chore', 'moderate'
-    
-    elif category == 'style':
-        return 'style', 'minimal'
-    
-    else:
-        return 'unknown', 'unknown'
+        return 'refactor', 'moderate'
+    return CATEGORY_CHANGE_TYPES.get(category, ('unknown', 'unknown'))
 
-def _generate_pr_summary(commit_analysis: CommitAnalysis, diff: str) -> str:
+def _generate_pr_summary(commit_analysis: CommitAnalysis, no_cache: bool = False) -> str:
     """Generate a PR-like summary using LLM analysis"""
     
+    # Shared by the prompt and the fallback; first-seen order keeps the prompt
+    # (and so its cache key) stable across runs
+    change_types = list(dict.fromkeys(ch.change_type for ch in commit_analysis.changes))
+    total_files = sum(len(ch.files_changed) for ch in commit_analysis.changes)
+    total_lines = sum(ch.additions + ch.deletions for ch in commit_analysis.changes)
+    
     try:
-        # Prepare context for LLM
-        change_context = {
-            "commit_message": commit_analysis.message,
-            "files_changed": sum(len(ch.files_changed) for ch in commit_analysis.changes),
-            "total_lines": sum(ch.additions + ch.deletions for ch in commit_analysis.changes),
-            "change_types": list(set(ch.change_type for ch in commit_analysis.changes))
-        }
-        
         prompt = f"""As an expert code reviewer, summarize this commit in PR style:
 
 Commit Message: {commit_analysis.message}
-Files Changed: {change_context['files_changed']}
-Total Lines: {change_context['total_lines']}
-Change Types: {', '.join(change_context['change_types'])}
+Files Changed: {total_files}
+Total Lines: {total_lines}
+Change Types: {', '.join(change_types)}
 
 Provide a concise summary that includes:
 1. What was changed
@@ -314,23 +356,22 @@ Provide a concise summary that includes:
 
 Keep it to 2-3 sentences, professional tone."""
         
-        summary = complete(prompt, sys="You are a professional code reviewer writing PR descriptions.")
+        if no_cache:
+            evict(prompt, sys=PR_SUMMARY_SYS)
+        summary = cached_complete(prompt, sys=PR_SUMMARY_SYS)
         
         # Clean up LLM response
         summary = summary.strip().replace('\\n', ' ').replace('\\t', ' ')
-        summary = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', summary)  # Remove control chars
+        summary = _CTRL_RE.sub('', summary)  # Remove control chars
         
         if summary and len(summary) > 10:
             return summary
+        evict(prompt, sys=PR_SUMMARY_SYS)
         
     except Exception as e:
         log_info(f"PR summary generation failed: {e}")
     
     # Enhanced fallback summary
-    change_types = list(set(ch.change_type for ch in commit_analysis.changes))
-    total_files = sum(len(ch.files_changed) for ch in commit_analysis.changes)
-    total_lines = sum(ch.additions + ch.deletions for ch in commit_analysis.changes)
-    
     return f"Modified {total_files} files ({', '.join(change_types)}), {total_lines} lines. {commit_analysis.message}"
 
 def analyze_pull_request(repo_path: Path, pr_branch: str, base_branch: str = "main") -> Dict[str, Any]:
@@ -350,12 +391,23 @@ def analyze_pull_request(repo_path: Path, pr_branch: str, base_branch: str = "ma
     try:
         repo = Repo(repo_path)
         
-        # Get all commits in the PR branch that aren't in base branch
+        # Analyze each commit in the PR branch that isn't in base branch against its
+        # own parent; line counts and added files for every commit come from two git
+        # calls, which run in the background while the commit objects are read
+        rev_range = f'{base_branch}..{pr_branch}'
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            numstats_job = pool.submit(_log_by_commit, repo, rev_range, '--numstat')
+            added_job = pool.submit(_log_by_commit, repo, rev_range, '--name-only', '--diff-filter=A')
+            pr_commits = list(repo.iter_commits(rev_range))
+            numstats, added = numstats_job.result(), added_job.result()
+        
         commits = []
-        for commit in repo.iter_commits(f'{base_branch}..{pr_branch}'):
-            changes = detect_changes(repo_path, f'{base_branch}..HEAD', f'{base_branch}..{pr_branch}')
-            if 'commit_analysis' in changes:
-                commits.append(commit)
+        for commit in pr_commits:
+            commits.append(_commit_analysis(
+                commit,
+                _parse_numstat(numstats.get(commit.hexsha, '')),
+                frozenset(filter(None, added.get(commit.hexsha, '').split('\0')))
+            ))
         
         # Create PR analysis
         pr_analysis = PullRequestAnalysis(
@@ -364,7 +416,7 @@ def analyze_pull_request(repo_path: Path, pr_branch: str, base_branch: str = "ma
             author="Unknown",  # Would need GitHub API for actual author
             branch=pr_branch,
             base_branch=base_branch,
-            commits=[],  # Would populate from actual GitHub API
+            commits=commits,
             description=f"Analysis of branch {pr_branch} against {base_branch}"
         )
         
@@ -1,14 +1,23 @@
 # Advanced Feature Planning - Cognitive Layer
 from __future__ import annotations
-import json
-import re
+import orjson
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from fern.tools.llm import complete
+from fern.tools.llm import system_prompt
+from fern.tools.llm_cache import cached_complete, evict
 from fern.tools.fs import snapshot_repo
 from fern.tools.logger import log_info, log_progress
 
+# str.translate table for LLM JSON: tab/newline -> space, other control chars removed
+_CTRL_TABLE = dict.fromkeys([*range(0x00, 0x20), *range(0x7f, 0xa0)])
+_CTRL_TABLE.update({ord('\t'): ' ', ord('\n'): ' '})
+
+# Most repository snapshot text a planning prompt carries
+REPO_CONTEXT_CHARS = 10000
+
 class FeaturePlan:
+    __slots__ = ("goal", "subtasks", "priority", "estimated_effort", "dependencies")
+    
     def __init__(self, goal: str, subtasks: List[Subtask], priority: str = "medium"):
         self.goal = goal
         self.subtasks = subtasks
@@ -18,12 +27,12 @@ class FeaturePlan:
         
     def _extract_dependencies(self) -> List[str]:
         """Extract file and system dependencies from subtasks"""
-        deps = set()
+        deps = {}  # ordered set: keeps subtask order so plans serialize deterministically
         for task in self.subtasks:
             if hasattr(task, 'file') and task.file:
-                deps.add(task.file)
+                deps[task.file] = None
             if hasattr(task, 'dependencies') and task.dependencies:
-                deps.update(task.dependencies)
+                deps.update(dict.fromkeys(task.dependencies))
         return list(deps)
     
     def to_dict(self) -> Dict[str, Any]:
@@ -36,6 +45,8 @@ class FeaturePlan:
         }
 
 class Subtask:
+    __slots__ = ("id", "description", "tool", "args", "estimated_effort", "dependencies", "risk_level")
+    
     def __init__(self, id: str, description: str, tool: str, args: Dict[str, Any], 
                  estimated_effort: int = 1, dependencies: Optional[List[str]] = None,
                  risk_level: str = "low"):
@@ -58,7 +69,7 @@ class Subtask:
             "risk_level": self.risk_level
         }
 
-PLAN_FEATURE_SYS = """You are Fern's advanced feature planner. Given a feature goal, break it into structured, executable subtasks.
+PLAN_FEATURE_SYS = system_prompt("""You are Fern's advanced feature planner. Given a feature goal, break it into structured, executable subtasks.
 
 Focus on:
 1. Breaking complex goals into atomic, testable units
@@ -94,16 +105,18 @@ Guidelines:
 - Include testing tasks for each major feature
 - Consider code review and documentation tasks
 - Account for setup/teardown requirements
-- Include validation and verification steps"""
+- Include validation and verification steps""")
 
-def plan_feature(goal: str, repo_path: Optional[Path] = None, max_chars: int = 20000) -> FeaturePlan:
+def plan_feature(goal: str, repo_path: Optional[Path] = None, max_chars: int = 20000,
+                 no_cache: bool = False) -> FeaturePlan:
     """
     Break a feature goal into structured, executable subtasks.
     
     Args:
         goal: The feature goal to plan
         repo_path: Optional path to repository for context
-        max_chars: Maximum characters for repository snapshot
+        max_chars: Maximum characters for repository snapshot (capped at REPO_CONTEXT_CHARS)
+        no_cache: Always ask the LLM instead of reusing a cached plan for the same prompt
         
     Returns:
         FeaturePlan object with structured subtasks, dependencies, and metadata
@@ -114,9 +127,12 @@ def plan_feature(goal: str, repo_path: Optional[Path] = None, max_chars: int = 2
     repo_context = ""
     if repo_path and repo_path.exists():
         try:
-            repo_context = snapshot_repo(repo_path, max_chars=max_chars)
+            # Only ask for what the prompt keeps; snapshot_repo can overshoot by its
+            # last file, so the slice still enforces the bound
+            limit = min(max_chars, REPO_CONTEXT_CHARS)
+            repo_context = snapshot_repo(repo_path, max_chars=limit)
             if repo_context:
-                repo_context = f"Repository context:\n{repo_context[:10000]}\n\n"
+                repo_context = f"Repository context:\n{repo_context[:limit]}\n\n"
         except Exception as e:
             log_info(f"Could not snapshot repository: {e}")
     
@@ -126,7 +142,9 @@ Break this goal into structured, executable subtasks. Consider the repository st
 Return only valid JSON."""
     
     try:
-        response = complete(prompt, sys=PLAN_FEATURE_SYS)
+        if no_cache:
+            evict(prompt, sys=PLAN_FEATURE_SYS)
+        response = cached_complete(prompt, sys=PLAN_FEATURE_SYS)
         
         # More robust JSON extraction
         response = response.strip()
@@ -136,14 +154,12 @@ Return only valid JSON."""
         json_end = response.rfind('}')
         
         if json_start != -1 and json_end != -1:
-            json_str = response[json_start:json_end+1]
-            
-            # Clean common LLM artifacts
-            json_str = json_str.replace('\\n', ' ').replace('\\t', ' ')
-            json_str = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', json_str)  # Remove control chars
+            # Clean common LLM artifacts: raw tabs/newlines become spaces, other
+            # control chars are dropped, all in one translate pass
+            json_str = response[json_start:json_end+1].translate(_CTRL_TABLE)
             
             try:
-                plan_data = json.loads(json_str)
+                plan_data = orjson.loads(json_str)
                 
                 # Validate and create subtasks
                 subtasks = []
@@ -168,8 +184,9 @@ Return only valid JSON."""
                 log_info(f"Created feature plan with {len(subtasks)} subtasks")
                 return feature_plan
                 
-            except json.JSONDecodeError as je:
+            except orjson.JSONDecodeError as je:
                 log_info(f"JSON parsing failed: {je}, using fallback")
+                evict(prompt, sys=PLAN_FEATURE_SYS)
                 
     except Exception as e:
         log_info(f"Advanced planning failed: {e}")
@@ -1,15 +1,98 @@
 # Task Prioritization Engine - Cognitive Layer
 from __future__ import annotations
-import json
+import orjson
 import re
+from operator import attrgetter
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Union
 from datetime import datetime, timedelta
+from functools import lru_cache
 from fern.tools.llm import complete
 from fern.tools.logger import log_info, log_progress
 from fern.cognitive.analyzer import analyze_repo
 
+# Task categories in priority order, each with the keywords that select it.
+# Keywords match at the start of a word ("auth" matches "authentication").
+CATEGORY_KEYWORDS = {
+    'security_critical': ['security', 'auth', 'login', 'password', 'api'],
+    'performance': ['performance', 'speed', 'slow', 'optimize', 'cache'],
+    'bug_fix': ['bug', 'error', 'crash', 'broken'],
+    'feature_request': ['add', 'implement', 'new', 'feature'],
+    'technical_debt': ['refactor', 'cleanup', 'debt', 'legacy', 'technical'],
+    'documentation': ['doc', 'readme', 'comment', 'documentation'],
+    'testing': ['test', 'testing', 'coverage', 'unit test'],
+    'infrastructure': ['deploy', 'docker', 'ci', 'infrastructure', 'devops'],
+}
+CATEGORY_ORDER = tuple(CATEGORY_KEYWORDS)
+
+# Task types inferred from issue text, in priority order (same word-start matching)
+TASK_TYPE_KEYWORDS = {
+    'bug': ['bug', 'error', 'crash', 'broken'],
+    'feature': ['feature', 'add', 'implement', 'new'],
+    'refactor': ['refactor', 'cleanup', 'improve'],
+}
+
+# Severity hints in an issue title when its labels don't decide it
+TITLE_SEVERITY_KEYWORDS = {
+    'high': ['critical', 'urgent', 'security'],
+    'low': ['minor', 'small'],
+}
+
+def _keyword_regex(table: Dict[str, List[str]]) -> re.Pattern:
+    """One alternation with a named group per key, each matching its words at a word start"""
+    return re.compile('|'.join(
+        rf"(?P<{name}>\b(?:{'|'.join(sorted(map(re.escape, words), key=len, reverse=True))}))"
+        for name, words in table.items()
+    ))
+
+def _first_keyword_match(pattern: re.Pattern, text: str) -> Optional[str]:
+    """Highest-priority (first-declared) group of `pattern` found anywhere in `text`"""
+    found = {m.lastgroup for m in pattern.finditer(text.lower())}
+    return next((name for name in pattern.groupindex if name in found), None)
+
+_CATEGORY_RE = _keyword_regex(CATEGORY_KEYWORDS)
+_TASK_TYPE_RE = _keyword_regex(TASK_TYPE_KEYWORDS)
+_TITLE_SEVERITY_RE = _keyword_regex(TITLE_SEVERITY_KEYWORDS)
+
+@lru_cache(maxsize=4096)
+def _infer_task_type(text: str) -> str:
+    """Infer task type from text content (memoized: issue dumps repeat titles a lot)"""
+    return _first_keyword_match(_TASK_TYPE_RE, text) or 'general'
+
+# Scoring tables
+CATEGORY_BASE_SCORES = {
+    'security_critical': 10,
+    'bug_fix': 8,
+    'performance': 7,
+    'feature_request': 6,
+    'technical_debt': 5,
+    'testing': 4,
+    'documentation': 3,
+    'infrastructure': 6,
+    'general': 4
+}
+SEVERITY_MULTIPLIERS = {'critical': 2.0, 'high': 1.5, 'medium': 1.0, 'low': 0.7}
+EFFORT_FACTORS = {'small': 1.2, 'medium': 1.0, 'large': 0.8, 'xlarge': 0.6}  # easier tasks get a slight boost
+EFFORT_RISKS = {'small': 2, 'medium': 4, 'large': 7, 'xlarge': 9}
+EFFORT_SCORES = {'small': 1, 'medium': 3, 'large': 5, 'xlarge': 8}
+
+# Longest issue/log text parse_issues_from_text will scan
+MAX_ISSUE_TEXT_CHARS = 2_000_000
+
+# Issue formats recognized in free text, each scanned on its own so one format's
+# body can't swallow another's header: "#12 title\nbody", "TODO: title\nbody"
+# (any case) and "FAIL name\nerror". Line runs are possessive (++ / *+): a line
+# always ends at "\n", so there is nothing to give back and a scan can't
+# backtrack through long logs.
+_GITHUB_ISSUE_RE = re.compile(r'#(\d+)\s+([^\n]++)\n([^\n]++(?:\n(?!#+)[^\n]++)*+)')
+_TODO_RE = re.compile(r'TODO[:\s]+([^\n]++)(?:\n([^\n]++(?:\n(?![A-Z]{2,}:)[^\n]++)*+))?', re.IGNORECASE)
+_TEST_FAILURE_RE = re.compile(r'(?:FAIL|ERROR|FAILED)\s+([^\n]++)\n([^\n]++(?:\n(?![A-Z]{2,}:)[^\n]++)*+)')
+
 class TaskItem:
+    __slots__ = ("id", "title", "description", "task_type", "severity", "effort", "dependencies",
+                 "source", "created_date", "impact_score", "risk_score", "priority_score", "category",
+                 "_score_inputs")
+    
     def __init__(self, id: str, title: str, description: str, task_type: str,
                  severity: str = "medium", effort: str = "medium", 
                  dependencies: List[str] = None, source: str = "manual",
@@ -28,88 +111,50 @@ class TaskItem:
         self.impact_score = 0
         self.risk_score = 0
         self.priority_score = 0
+        self._score_inputs = None
         self.category = self._categorize_task()
         
     def _categorize_task(self) -> str:
         """Categorize task based on type and content"""
-        title_lower = self.title.lower()
-        desc_lower = self.description.lower()
-        
-        # Critical system components
-        if any(keyword in title_lower + desc_lower for keyword in ['security', 'auth', 'login', 'password', 'api']):
-            return 'security_critical'
-        
-        # Performance related
-        elif any(keyword in title_lower + desc_lower for keyword in ['performance', 'speed', 'slow', 'optimize', 'cache']):
-            return 'performance'
-        
-        # Bug fixes
-        elif self.task_type == 'bug' or any(keyword in title_lower + desc_lower for keyword in ['bug', 'error', 'crash', 'broken']):
-            return 'bug_fix'
-        
-        # Feature requests
-        elif self.task_type == 'feature' or any(keyword in title_lower + desc_lower for keyword in ['add', 'implement', 'new', 'feature']):
-            return 'feature_request'
-        
-        # Technical debt
-        elif any(keyword in title_lower + desc_lower for keyword in ['refactor', 'cleanup', 'debt', 'legacy', 'technical']):
-            return 'technical_debt'
-        
-        # Documentation
-        elif any(keyword in title_lower + desc_lower for keyword in ['doc', 'readme', 'comment', 'documentation']):
-            return 'documentation'
-        
-        # Testing
-        elif any(keyword in title_lower + desc_lower for keyword in ['test', 'testing', 'coverage', 'unit test']):
-            return 'testing'
-        
-        # Infrastructure/DevOps
-        elif any(keyword in title_lower + desc_lower for keyword in ['deploy', 'docker', 'ci', 'infrastructure', 'devops']):
-            return 'infrastructure'
+        # One scan collects every category whose keywords appear; priority is then
+        # decided by CATEGORY_ORDER rather than by where in the text a keyword sits
+        found = {m.lastgroup for m in _CATEGORY_RE.finditer(f"{self.title} {self.description}".lower())}
+        if self.task_type == 'bug':
+            found.add('bug_fix')
+        elif self.task_type == 'feature':
+            found.add('feature_request')
         
-        else:
-            return 'general'
+        for category in CATEGORY_ORDER:
+            if category in found:
+                return category
+        return 'general'
     
-    def calculate_scores(self, repo_analysis: Optional[Dict[str, Any]] = None):
-        """Calculate impact and risk scores"""
-        self._calculate_impact_score(repo_analysis)
-        self._calculate_risk_score()
-        self._calculate_priority_score()
+    def calculate_scores(self, repo_analysis: Optional[Dict[str, Any]] = None,
+                         now: Optional[datetime] = None):
+        """Calculate impact and risk scores (`now` lets a batch share one clock reading)"""
+        # Impact and risk only change with these inputs, so re-prioritizing the same
+        # tasks (e.g. under another strategy) skips them; priority has an age term
+        # and is always refreshed. Of the repo analysis, impact only reads whether there
+        # is one and its project_type.
+        project_type = repo_analysis.get('project_type', 'general') if repo_analysis else None
+        inputs = (bool(repo_analysis), project_type, self.category, self.task_type, self.severity,
+                  self.effort, len(self.dependencies))
+        if inputs != self._score_inputs:
+            self._calculate_impact_score(repo_analysis)
+            self._calculate_risk_score()
+            self._score_inputs = inputs
+        self._calculate_priority_score(now)
         
     def _calculate_impact_score(self, repo_analysis: Optional[Dict[str, Any]] = None):
         """Calculate impact score based on task type and context"""
-        base_scores = {
-            'security_critical': 10,
-            'bug_fix': 8,
-            'performance': 7,
-            'feature_request': 6,
-            'technical_debt': 5,
-            'testing': 4,
-            'documentation': 3,
-            'infrastructure': 6,
-            'general': 4
-        }
-        
         # Base score for category
-        self.impact_score = base_scores.get(self.category, 4)
+        self.impact_score = CATEGORY_BASE_SCORES.get(self.category, 4)
         
         # Severity multiplier
-        severity_multipliers = {
-            'critical': 2.0,
-            'high': 1.5,
-            'medium': 1.0,
-            'low': 0.7
-        }
-        self.impact_score *= severity_multipliers.get(self.severity, 1.0)
+        self.impact_score *= SEVERITY_MULTIPLIERS.get(self.severity, 1.0)
         
         # Effort factor (inverse - easier tasks get slight boost)
-        effort_factors = {
-            'small': 1.2,
-            'medium': 1.0,
-            'large': 0.8,
-            'xlarge': 0.6
-        }
-        self.impact_score *= effort_factors.get(self.effort, 1.0)
+        self.impact_score *= EFFORT_FACTORS.get(self.effort, 1.0)
         
         # Repository context factor
         if repo_analysis:
@@ -126,13 +171,7 @@ class TaskItem:
         base_risk = 5  # Base risk level
         
         # Effort-based risk
-        effort_risks = {
-            'small': 2,
-            'medium': 4,
-            'large': 7,
-            'xlarge': 9
-        }
-        base_risk += effort_risks.get(self.effort, 4)
+        base_risk += EFFORT_RISKS.get(self.effort, 4)
         
         # Dependency-based risk
         dep_risk = min(len(self.dependencies) * 2, 6)
@@ -152,13 +191,13 @@ class TaskItem:
         
         self.risk_score = min(base_risk, 15)  # Cap at 15
     
-    def _calculate_priority_score(self):
+    def _calculate_priority_score(self, now: Optional[datetime] = None):
         """Calculate final priority score (higher = more important)"""
         # Weighted combination of impact and risk, with inverse risk penalty
         self.priority_score = (self.impact_score * 2) - (self.risk_score * 0.5)
         
         # Age factor (tasks get more urgent over time)
-        age_days = (datetime.now() - self.created_date).days
+        age_days = ((now or datetime.now()) - self.created_date).days
         if age_days > 30:
             self.priority_score += 2
         elif age_days > 14:
@@ -187,20 +226,19 @@ class TaskPrioritizer:
         self.repo_analysis = None
         if repo_path and repo_path.exists():
             try:
+                # analyze_repo serves repeat calls from its own tree-fingerprint cache
                 self.repo_analysis = analyze_repo(repo_path)
             except Exception as e:
                 log_info(f"Could not analyze repository for prioritization: {e}")
     
     def parse_issues_from_text(self, text: str) -> List[TaskItem]:
         """Parse issues from text (GitHub issues, TODO comments, etc.)"""
-        tasks = []
+        if len(text) > MAX_ISSUE_TEXT_CHARS:
+            log_info(f"Issue text truncated to {MAX_ISSUE_TEXT_CHARS} of {len(text)} characters")
+            text = text[:MAX_ISSUE_TEXT_CHARS]
         
-        # Parse GitHub issue format
-        github_pattern = r'#(\d+)\s+([^\n]+)\n([^\n]+(?:\n(?!#+)[^\n]+)*)'
-        github_matches = re.findall(github_pattern, text)
-        
-        for match in github_matches:
-            issue_id, title, description = match
+        tasks = []
+        for issue_id, title, description in _GITHUB_ISSUE_RE.findall(text):
             tasks.append(TaskItem(
                 id=f"github-{issue_id}",
                 title=title.strip(),
@@ -209,25 +247,16 @@ class TaskPrioritizer:
                 source="github"
             ))
         
-        # Parse TODO format
-        todo_pattern = r'TODO[:\s]+([^\n]+)(?:\n([^\n]+(?:\n(?![A-Z]{2,}:)[^\n]+)*))?'
-        todo_matches = re.findall(todo_pattern, text, re.IGNORECASE)
-        
-        for i, (title, description) in enumerate(todo_matches):
+        for title, description in _TODO_RE.findall(text):
             tasks.append(TaskItem(
                 id=f"todo-{len(tasks)+1}",
                 title=title.strip(),
-                description=(description or "").strip(),
-                task_type=self._infer_task_type(title + " " + (description or "")),
+                description=description.strip(),
+                task_type=self._infer_task_type(title + " " + description),
                 source="todo"
             ))
         
-        # Parse test failure format
-        test_pattern = r'(FAIL|ERROR|FAILED)\s+([^\n]+)\n([^\n]+(?:\n(?![A-Z]{2,}:)[^\n]+)*)'
-        test_matches = re.findall(test_pattern, text)
-        
-        for match in test_matches:
-            status, test_name, error = match
+        for test_name, error in _TEST_FAILURE_RE.findall(text):
             tasks.append(TaskItem(
                 id=f"test-{len(tasks)+1}",
                 title=f"Fix test failure: {test_name}",
@@ -243,7 +272,7 @@ class TaskPrioritizer:
         """Parse issues from JSON data"""
         if isinstance(json_data, str):
             try:
-                json_data = json.loads(json_data)
+                json_data = orjson.loads(json_data)
             except Exception as e:
                 log_info(f"Failed to parse JSON: {e}")
                 return []
@@ -292,23 +321,25 @@ class TaskPrioritizer:
         """
         log_progress(f"Prioritizing {len(tasks)} tasks using {strategy} strategy")
         
-        # Calculate scores for all tasks
+        # Calculate scores for all tasks, aged against one shared clock reading
+        now = datetime.now()
         for task in tasks:
-            task.calculate_scores(self.repo_analysis)
+            task.calculate_scores(self.repo_analysis, now)
         
         # Apply prioritization strategy
+        # sorted() calls its key once per task; attrgetter keeps that call in C
         if strategy == "impact_first":
-            prioritized = sorted(tasks, key=lambda t: t.impact_score, reverse=True)
+            prioritized = sorted(tasks, key=attrgetter('impact_score'), reverse=True)
         elif strategy == "risk_averse":
             prioritized = sorted(tasks, key=lambda t: (t.impact_score, -t.risk_score), reverse=True)
         elif strategy == "quick_wins":
             prioritized = sorted(tasks, key=lambda t: (t.impact_score / max(1, self._effort_to_score(t.effort)), -t.risk_score), reverse=True)
         else:  # balanced
-            prioritized = sorted(tasks, key=lambda t: t.priority_score, reverse=True)
+            prioritized = sorted(tasks, key=attrgetter('priority_score'), reverse=True)
         
         # Apply constraints
         if constraints:
-            prioritized = self._apply_constraints(prioritized, constraints)
+            prioritized = self._apply_constraints(prioritized, constraints, now)
         
         # Create groups by priority level
         high_priority = [t for t in prioritized if t.priority_score >= 8]
@@ -318,30 +349,24 @@ class TaskPrioritizer:
         # Generate recommendations
         recommendations = self._generate_recommendations(prioritized, strategy)
         
+        # Serialize each task once; the top recommendations are the head of the same list
+        task_dicts = [task.to_dict() for task in prioritized]
+        
         return {
             "strategy": strategy,
             "total_tasks": len(tasks),
             "high_priority": len(high_priority),
             "medium_priority": len(medium_priority),
             "low_priority": len(low_priority),
-            "prioritized_tasks": [task.to_dict() for task in prioritized],
-            "top_recommendations": [task.to_dict() for task in prioritized[:5]],
+            "prioritized_tasks": task_dicts,
+            "top_recommendations": task_dicts[:5],
             "recommendations": recommendations,
             "constraint_summary": self._summarize_constraints(prioritized, constraints)
         }
     
     def _infer_task_type(self, text: str) -> str:
         """Infer task type from text content"""
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['bug', 'error', 'crash', 'broken']):
-            return 'bug'
-        elif any(word in text_lower for word in ['feature', 'add', 'implement', 'new']):
-            return 'feature'
-        elif any(word in text_lower for word in ['refactor', 'cleanup', 'improve']):
-            return 'refactor'
-        else:
-            return 'general'
+        return _infer_task_type(text)
     
     def _extract_severity(self, issue: Dict) -> str:
         """Extract severity from issue data"""
@@ -356,25 +381,14 @@ class TaskPrioritizer:
                         return 'low'
         
         # Check title for severity indicators
-        title = issue.get('title', '').lower()
-        if any(word in title for word in ['critical', 'urgent', 'security']):
-            return 'high'
-        elif any(word in title for word in ['minor', 'small']):
-            return 'low'
-        
-        return 'medium'
+        return _first_keyword_match(_TITLE_SEVERITY_RE, issue.get('title', '')) or 'medium'
     
     def _effort_to_score(self, effort: str) -> int:
         """Convert effort string to numeric score"""
-        effort_scores = {
-            'small': 1,
-            'medium': 3,
-            'large': 5,
-            'xlarge': 8
-        }
-        return effort_scores.get(effort, 3)
+        return EFFORT_SCORES.get(effort, 3)
     
-    def _apply_constraints(self, tasks: List[TaskItem], constraints: Dict[str, Any]) -> List[TaskItem]:
+    def _apply_constraints(self, tasks: List[TaskItem], constraints: Dict[str, Any],
+                           now: Optional[datetime] = None) -> List[TaskItem]:
         """Apply constraints to task list"""
         filtered = tasks.copy()
         
@@ -387,7 +401,7 @@ class TaskPrioritizer:
         if 'deadline' in constraints:
             deadline = datetime.fromisoformat(constraints['deadline'])
             # Prefer tasks that can be completed by deadline
-            urgency_weight = self._calculate_urgency_weight(tasks, deadline)
+            urgency_weight = self._calculate_urgency_weight(tasks, deadline, now)
             filtered.sort(key=lambda t: t.priority_score + urgency_weight.get(t.id, 0), reverse=True)
         
         # Max tasks constraint
@@ -396,10 +410,11 @@ class TaskPrioritizer:
         
         return filtered
     
-    def _calculate_urgency_weight(self, tasks: List[TaskItem], deadline: datetime) -> Dict[str, int]:
+    def _calculate_urgency_weight(self, tasks: List[TaskItem], deadline: datetime,
+                                  now: Optional[datetime] = None) -> Dict[str, int]:
         """Calculate urgency weights based on deadline"""
         weights = {}
-        time_remaining = deadline - datetime.now()
+        time_remaining = deadline - (now or datetime.now())
         
         for task in tasks:
             # Tasks with longer time remaining get slight priority boost
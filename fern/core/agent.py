@@ -1,14 +1,50 @@
 # Core agent loop
 from pathlib import Path
-import time, json
-from fern.core.planner import make_plan
+import atexit, time, json, threading
+from concurrent.futures import ThreadPoolExecutor
+from fern.core.planner import make_plan, PLAN_SNAPSHOT_CHARS
 from fern.tools.fs import snapshot_repo, apply_code_task
 from fern.tools.shell import run_tests
 from fern.tools.git import ensure_branch, git_commit_all
 from fern.rl.learner import Learner
 from fern.tools.fix_strategies import apply_fix_strategy
 from fern.tools.logger import log_info, log_success, log_error, log_progress
-from fern.core.state import append_history
+from fern.core.state import append_history, state_dir
+from fern.core.schedule import topo_sort, batches
+
+# Planning (snapshot + LLM) may overlap across goals; anything that touches the
+# working tree, index or branch is serialized per repo.
+_REPO_LOCKS: dict[str, threading.Lock] = {}
+_REPO_LOCKS_GUARD = threading.Lock()
+
+
+def repo_lock(repo: Path) -> threading.Lock:
+    key = str(repo.resolve())
+    with _REPO_LOCKS_GUARD:
+        return _REPO_LOCKS.setdefault(key, threading.Lock())
+
+
+# One worker keeps experience/history writes ordered; pending writes finish at exit
+_PERSIST = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fern-persist")
+atexit.register(_PERSIST.shutdown)
+
+
+def _persist_run(repo: Path, learner: Learner, goal: str, results: list, reward: float, result: dict):
+    try:
+        learner.record(str(repo), {"goal": goal}, "plan", {"results": results}, reward)
+        append_history(repo, result)
+    except Exception as e:
+        log_error(f"Could not record run for goal {goal!r}: {e}")
+
+
+def _run_task(repo: Path, t: dict):
+    tool = t.get("tool")
+    desc = t.get("desc")
+    log_progress(f"Running task: {desc} ({tool})")
+    if tool in ("code", "fs"):
+        apply_code_task(repo, t)
+    elif tool == "shell":
+        run_tests(repo, t.get("args", {}).get("cmd", "pytest -q"))
 
 
 def operate(repo: Path, goal: str) -> dict:
@@ -22,74 +58,74 @@ def operate(repo: Path, goal: str) -> dict:
     """
     start = time.time()
     repo.mkdir(exist_ok=True)
-    (repo / ".fern").mkdir(exist_ok=True)
+    state_dir(repo)
 
     log_progress(f"Starting goal: {goal}")
 
     # 1. Snapshot + Plan
-    snap = snapshot_repo(repo)
+    # the plan prompt keeps only PLAN_SNAPSHOT_CHARS, so don't read past that
+    snap = snapshot_repo(repo, max_chars=PLAN_SNAPSHOT_CHARS)
     log_info("Creating plan...")
     plan = make_plan(snap, goal)
 
-    ensure_branch(repo, "fern/work")
-    results = []
-    learner = Learner(db_path=repo / ".fern" / "experience.duckdb")
-
-    # 2. Execute tasks
-    for t in plan["tasks"]:
-        tool = t.get("tool")
-        desc = t.get("desc")
-        log_progress(f"Running task: {desc} ({tool})")
-        if tool in ("code", "fs"):
-            apply_code_task(repo, t)
-        elif tool == "shell":
-            run_tests(repo, t.get("args", {}).get("cmd", "pytest -q"))
-        results.append(t)
-
-    # 3. Run checks
-    log_info("Running checks...")
-    tests_pass = run_tests(repo, "pytest -q") == 0
-    lint_ok = run_tests(repo, "ruff check .") == 0
-    type_ok = run_tests(repo, "mypy .") == 0
-
-    if tests_pass and lint_ok and type_ok:
-        log_success("All checks passed ✅")
-    else:
-        (log_error if not tests_pass else log_progress)("Issues detected, applying fix strategy...")
-
-    # 4. Reward
-    reward = learner.compute_reward(
-        tests_pass=float(tests_pass),
-        lint_ok=lint_ok,
-        type_ok=type_ok,
-        human_fb=0.0,
-        diff_ratio=0.1,
-        retries_ratio=0.0,
-    )
-
-    # 5. Fix if needed
-    if not (tests_pass and lint_ok and type_ok):
-        ctx = {"goal": goal, "err_type": "tests" if not tests_pass else "lint"}
-        action = learner.select_action(ctx)
-        log_info(f"Selected fix strategy: {action}")
-        apply_fix_strategy(repo, action, ctx)
-
-    # 6. Record & Commit
-    learner.record(str(repo), {"goal": goal}, "plan", {"results": results}, reward)
-    git_commit_all(repo, f"fern: {goal}")
-
-    result = {
-        "goal": goal,
-        "tasks": results,
-        "tests_pass": tests_pass,
-        "lint_ok": lint_ok,
-        "type_ok": type_ok,
-        "reward": reward,
-        "elapsed": round(time.time() - start, 2),
-    }
-
-    # 7. Save run history
-    append_history(repo, result)
+    with repo_lock(repo):
+        ensure_branch(repo, "fern/work")
+        results = []
+        learner = Learner(db_path=repo / ".fern" / "experience.duckdb")
+
+        # 2. Execute tasks, dependencies first; independent file writes run together
+        for batch in batches(topo_sort(plan["tasks"])):
+            if len(batch) == 1:
+                _run_task(repo, batch[0])
+            else:
+                with ThreadPoolExecutor(max_workers=min(len(batch), 8)) as pool:
+                    list(pool.map(lambda t: _run_task(repo, t), batch))
+            results.extend(batch)
+
+        # 3. Run checks
+        # read-only checks (no --fix), so they can run side by side
+        log_info("Running checks...")
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            checks = [pool.submit(run_tests, repo, cmd) for cmd in ("pytest -q", "ruff check .", "mypy .")]
+            tests_pass, lint_ok, type_ok = (f.result() == 0 for f in checks)
+
+        if tests_pass and lint_ok and type_ok:
+            log_success("All checks passed ✅")
+        else:
+            (log_error if not tests_pass else log_progress)("Issues detected, applying fix strategy...")
+
+        # 4. Reward
+        reward = learner.compute_reward(
+            tests_pass=float(tests_pass),
+            lint_ok=lint_ok,
+            type_ok=type_ok,
+            human_fb=0.0,
+            diff_ratio=0.1,
+            retries_ratio=0.0,
+        )
+
+        # 5. Fix if needed
+        if not (tests_pass and lint_ok and type_ok):
+            ctx = {"goal": goal, "err_type": "tests" if not tests_pass else "lint"}
+            action = learner.select_action(ctx)
+            log_info(f"Selected fix strategy: {action}")
+            apply_fix_strategy(repo, action, ctx)
+
+        # 6. Commit (stays synchronous: the next attempt builds on this tree)
+        git_commit_all(repo, f"fern: {goal}")
+
+        result = {
+            "goal": goal,
+            "tasks": results,
+            "tests_pass": tests_pass,
+            "lint_ok": lint_ok,
+            "type_ok": type_ok,
+            "reward": reward,
+            "elapsed": round(time.time() - start, 2),
+        }
+
+        # 7. Record experience & run history in the background, in submission order
+        _PERSIST.submit(_persist_run, repo, learner, goal, results, reward, dict(result))
 
     log_success(f"Finished goal: {goal} (reward={reward:.2f})")
     return result
@@ -1,21 +1,29 @@
 # Planner logic
 import json
-from fern.tools.llm import complete
+from fern.tools.llm import extract_json_object
+from fern.tools.llm_cache import cached_complete, evict
 from fern.core.prompts import PLAN_SYS
 
+# Most repository snapshot text a plan prompt carries
+PLAN_SNAPSHOT_CHARS = 20000
+
 def make_plan(repo_snapshot: str, goal: str) -> dict:
     prompt = f"""Repo snapshot:
-{repo_snapshot[:20000]}
+{repo_snapshot[:PLAN_SNAPSHOT_CHARS]}
 
 Goal:
 {goal}
 
 Return only JSON."""
-    text = complete(prompt, sys=PLAN_SYS)
+    # same snapshot + goal (e.g. a retry that changed nothing) reuses the stored reply;
+    # it's parsed afresh each time, so callers may mutate the plan
+    text = cached_complete(prompt, sys=PLAN_SYS)
     try:
-        plan = json.loads(text)
+        # models often wrap the object in prose or a code fence; parse just the object
+        plan = json.loads(extract_json_object(text))
         assert isinstance(plan.get("tasks"), list)
         return plan
     except Exception:
+        evict(prompt, sys=PLAN_SYS)  # don't replay an unusable reply on the next attempt
         # fallback: 1 task
         return {"tasks": [{"id": "T0", "desc": goal, "tool": "code", "args": {}}]}
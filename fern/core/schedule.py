@@ -0,0 +1,77 @@
+# Plan task scheduling
+import heapq
+
+
+def task_deps(task: dict) -> list:
+    """Ids a plan task says it depends on ("deps" or "dependencies")."""
+    deps = task.get("deps") or task.get("dependencies") or []
+    return [deps] if isinstance(deps, str) else list(deps)
+
+
+def topo_sort(tasks: list[dict]) -> list[dict]:
+    """
+    Order plan tasks so each runs after the tasks it depends on (Kahn's algorithm).
+
+    Among tasks that are ready, plan order wins, so a plan without dependencies
+    keeps its order. Unknown ids are ignored; tasks caught in a cycle run last,
+    in plan order.
+    """
+    if not any(map(task_deps, tasks)):
+        return list(tasks)  # the usual plan: nothing to order, skip the graph
+
+    index = {t.get("id"): i for i, t in enumerate(tasks) if t.get("id") is not None}
+    indegree = [0] * len(tasks)
+    dependents: list[list[int]] = [[] for _ in tasks]
+    for i, t in enumerate(tasks):
+        for dep in dict.fromkeys(task_deps(t)):
+            j = index.get(dep)
+            if j is not None and j != i:
+                indegree[i] += 1
+                dependents[j].append(i)
+
+    ready = [i for i, n in enumerate(indegree) if n == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        i = heapq.heappop(ready)
+        order.append(i)
+        for k in dependents[i]:
+            indegree[k] -= 1
+            if indegree[k] == 0:
+                heapq.heappush(ready, k)
+
+    if len(order) < len(tasks):
+        placed = set(order)
+        order.extend(i for i in range(len(tasks)) if i not in placed)
+    return [tasks[i] for i in order]
+
+
+# Tools whose tasks only write their own file and can run side by side
+WRITE_TOOLS = ("code", "fs")
+
+
+def batches(tasks: list[dict]) -> list[list[dict]]:
+    """
+    Split already-ordered tasks into batches that are safe to run concurrently.
+
+    A batch is a run of consecutive file-writing tasks that touch distinct files
+    and don't depend on each other; any other task (shell, git, ...) reads or
+    changes the whole tree, so it gets a batch to itself.
+    """
+    out: list[list[dict]] = []
+    files: set = set()
+    ids: set = set()
+    for t in tasks:
+        file = t.get("args", {}).get("file")
+        joinable = (
+            out and t.get("tool") in WRITE_TOOLS and out[-1][0].get("tool") in WRITE_TOOLS
+            and file not in files and ids.isdisjoint(task_deps(t))
+        )
+        if not joinable:
+            out.append([])
+            files, ids = set(), set()
+        out[-1].append(t)
+        if file is not None:
+            files.add(file)
+        ids.add(t.get("id"))
+    return out
@@ -1,45 +1,133 @@
 # Repo state management
 # Placeholder for project state tracking
 # (e.g. fern could store repo metadata, backlog, progress here)
-import json
+import os
+import orjson
 from pathlib import Path
 from datetime import datetime
 
+# Caches FERN rebuilds on demand; `git add -A` must not sweep them into the user's commits.
+# history.jsonl stays tracked: it is the record the caches are derived from.
+STATE_GITIGNORE = b"stats.json\nlast_review\nlast_repo_review\n*.tmp\n"
+
+def state_dir(repo: Path) -> Path:
+    """repo/.fern, created on first use together with a .gitignore for its caches."""
+    d = repo / ".fern"
+    ignore = d / ".gitignore"
+    if not ignore.exists():
+        d.mkdir(parents=True, exist_ok=True)
+        ignore.write_bytes(STATE_GITIGNORE)
+    return d
+
 def history_file(repo: Path):
+    # JSON Lines: one run per line, so recording a run is a single append
+    return repo / ".fern" / "history.jsonl"
+
+def _legacy_history_file(repo: Path):
     return repo / ".fern" / "history.json"
 
+def stats_file(repo: Path):
+    return repo / ".fern" / "stats.json"
+
+def _migrate_history(repo: Path):
+    """One-time conversion of the old JSON-array history.json into history.jsonl."""
+    legacy, hf = _legacy_history_file(repo), history_file(repo)
+    if hf.exists() or not legacy.exists():
+        return
+    hist = orjson.loads(legacy.read_bytes())
+    tmp = hf.with_name(hf.name + ".tmp")
+    tmp.write_bytes(b"".join(_dumps_line(h) for h in hist))
+    os.replace(tmp, hf)
+    legacy.unlink()
+
 def append_history(repo: Path, entry: dict):
+    _migrate_history(repo)
     hf = history_file(repo)
-    hist = []
-    if hf.exists():
-        hist = json.loads(hf.read_text())
+    offset = hf.stat().st_size if hf.exists() else 0
     entry["ts"] = datetime.now().isoformat()
-    hist.append(entry)
-    hf.write_text(json.dumps(hist, indent=2))
+    with hf.open("ab") as f:
+        f.write(_dumps_line(entry))
+    _update_totals(repo, entry, offset, hf.stat().st_size)
+
+def _dumps_line(entry: dict) -> bytes:
+    return orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+
+def _totals_from_history(history: list[dict]) -> dict:
+    reward_sum = tests_pass = lint_ok = type_ok = 0
+    for h in history:
+        reward_sum += h.get("reward", 0)
+        tests_pass += bool(h.get("tests_pass"))
+        lint_ok += bool(h.get("lint_ok"))
+        type_ok += bool(h.get("type_ok"))
+    return {
+        "runs": len(history),
+        "reward_sum": reward_sum,
+        "tests_pass": tests_pass,
+        "lint_ok": lint_ok,
+        "type_ok": type_ok,
+        "last": history[-1] if history else None,
+    }
+
+def _read_totals(repo: Path) -> dict | None:
+    try:
+        totals = orjson.loads(stats_file(repo).read_bytes())
+        return totals if isinstance(totals, dict) and "runs" in totals else None
+    except (OSError, ValueError):
+        return None
+
+def _update_totals(repo: Path, entry: dict, offset: int, end: int):
+    """Fold one run into the running aggregate; rebuild it if it's out of step with history.
+
+    The aggregate remembers the history size it covers, so `offset` (the size before
+    this entry was appended) tells whether it is current without reading the history.
+    """
+    totals = _read_totals(repo)
+    if totals is None or totals.get("history_bytes") != offset:
+        totals = _totals_from_history(load_history(repo))
+    else:
+        totals["runs"] += 1
+        totals["reward_sum"] += entry.get("reward", 0)
+        totals["tests_pass"] += bool(entry.get("tests_pass"))
+        totals["lint_ok"] += bool(entry.get("lint_ok"))
+        totals["type_ok"] += bool(entry.get("type_ok"))
+        totals["last"] = entry
+    totals["history_bytes"] = end
+    state_dir(repo)
+    stats_file(repo).write_bytes(orjson.dumps(totals, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
 def load_history(repo: Path):
+    _migrate_history(repo)
     hf = history_file(repo)
-    if hf.exists():
-        return json.loads(hf.read_text())
-    return []
+    if not hf.exists():
+        return []
+    history = []
+    for line in hf.read_bytes().splitlines():
+        try:
+            history.append(orjson.loads(line))
+        except ValueError:
+            pass  # blank, or a line cut short by an interrupted write
+    return history
 
 def compute_stats(history: list[dict]) -> dict:
-    if not history:
+    return _stats_from_totals(_totals_from_history(history))
+
+def _stats_from_totals(totals: dict) -> dict:
+    runs = totals["runs"]
+    if not runs:
         return {"runs": 0, "avg_reward": 0.0, "tests_pass_rate": 0.0,
                 "lint_pass_rate": 0.0, "type_pass_rate": 0.0, "last": None}
-
-    runs = len(history)
-    avg_reward = sum(h.get("reward", 0) for h in history) / runs
-    tests_pass_rate = sum(1 for h in history if h.get("tests_pass")) / runs
-    lint_pass_rate = sum(1 for h in history if h.get("lint_ok")) / runs
-    type_pass_rate = sum(1 for h in history if h.get("type_ok")) / runs
-    last = history[-1]
-
     return {
         "runs": runs,
-        "avg_reward": avg_reward,
-        "tests_pass_rate": tests_pass_rate,
-        "lint_pass_rate": lint_pass_rate,
-        "type_pass_rate": type_pass_rate,
-        "last": last,
+        "avg_reward": totals["reward_sum"] / runs,
+        "tests_pass_rate": totals["tests_pass"] / runs,
+        "lint_pass_rate": totals["lint_ok"] / runs,
+        "type_pass_rate": totals["type_ok"] / runs,
+        "last": totals["last"],
     }
+
+def load_stats(repo: Path) -> dict:
+    """Same shape as compute_stats(), read from the running aggregate (O(1) in history size)."""
+    totals = _read_totals(repo)
+    if totals is None:
+        return compute_stats(load_history(repo))
+    return _stats_from_totals(totals)
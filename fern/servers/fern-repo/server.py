@@ -1,8 +1,29 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
-import subprocess
+import asyncio, os, re, shutil, subprocess
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # run the tool once at startup so its files are in the page cache before the first request
+    try:
+        proc = await asyncio.create_subprocess_exec("git", "--version", stdout=asyncio.subprocess.DEVNULL,
+                                                    stderr=asyncio.subprocess.DEVNULL)
+        await proc.wait()
+    except OSError:
+        pass
+    yield
+
+app = FastAPI(lifespan=lifespan)
+
+REPO_DIR = "/repos/repo"
+
+# Plain https remotes only: no option-looking values (--upload-pack=...), no ext:: or file transports
+CLONE_URL_RE = re.compile(r"https://[A-Za-z0-9._~:@%+-]+(?:/[A-Za-z0-9._~:@%+-]+)*/?")
+
+# Every endpoint writes the one checkout; concurrent requests take turns, so a repeated
+# clone_repo for the same URL waits and then only fetches what changed
+_repo_lock = asyncio.Lock()
 
 class CloneRepoRequest(BaseModel):
     url: str
@@ -10,14 +31,45 @@ class CloneRepoRequest(BaseModel):
 class CommitRequest(BaseModel):
     message: str
 
+async def run_checked(*cmd: str, cwd: str | None = None):
+    """subprocess.run(cmd, check=True) without holding a worker thread while git runs."""
+    proc = await asyncio.create_subprocess_exec(*cmd, cwd=cwd)
+    if await proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+async def origin_url(path: str) -> str | None:
+    if not os.path.isdir(os.path.join(path, ".git")):
+        return None
+    proc = await asyncio.create_subprocess_exec(
+        "git", "remote", "get-url", "origin", cwd=path,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+    )
+    out, _ = await proc.communicate()
+    return out.decode().strip() if proc.returncode == 0 else None
+
+async def _clone_or_refresh(url: str):
+    # only the tip is needed to test, edit and push; history stays on the remote
+    if await origin_url(REPO_DIR) == url:
+        # same remote as last time: fetch what changed into the objects already on disk
+        await run_checked("sh", "-c", "git fetch --depth=1 origin HEAD && git reset -q --hard FETCH_HEAD"
+                          " && git clean -qfdx", cwd=REPO_DIR)
+    else:
+        if os.path.lexists(REPO_DIR):
+            await asyncio.to_thread(shutil.rmtree, REPO_DIR)
+        await run_checked("git", "clone", "--depth=1", "--single-branch", "--", url, REPO_DIR)
+
 @app.post("/clone_repo")
-def clone_repo(req: CloneRepoRequest):
-    subprocess.run(["git", "clone", req.url, "/repos/repo"], check=True)
-    return {"success": True, "path": "/repos/repo"}
+async def clone_repo(req: CloneRepoRequest):
+    if not CLONE_URL_RE.fullmatch(req.url):
+        raise HTTPException(status_code=400, detail="url must be a plain https:// git remote")
+    async with _repo_lock:
+        await _clone_or_refresh(req.url)
+    return {"success": True, "path": REPO_DIR}
 
 @app.post("/commit_and_push")
-def commit_and_push(req: CommitRequest):
-    subprocess.run(["git", "add", "."], cwd="/repos/repo", check=True)
-    subprocess.run(["git", "commit", "-m", req.message], cwd="/repos/repo", check=True)
-    subprocess.run(["git", "push"], cwd="/repos/repo", check=True)
+async def commit_and_push(req: CommitRequest):
+    # one shell, one fork/exec; the message goes in as $1, never through the shell parser
+    async with _repo_lock:
+        await run_checked("sh", "-c", 'git add . && git commit -m "$1" && git push', "sh", req.message,
+                          cwd=REPO_DIR)
     return {"success": True}
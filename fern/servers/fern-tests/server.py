@@ -1,21 +1,72 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
-import subprocess
+from collections import OrderedDict
+import asyncio, os
+from fingerprint import tree_state  # fern/tools/fingerprint.py, copied in by the Dockerfile
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # run the tool once at startup so its files are in the page cache before the first request
+    try:
+        proc = await asyncio.create_subprocess_exec("pytest", "--version", stdout=asyncio.subprocess.DEVNULL,
+                                                    stderr=asyncio.subprocess.DEVNULL)
+        await proc.wait()
+    except OSError:
+        pass
+    yield
+
+app = FastAPI(lifespan=lifespan)
+
+# Longest pytest output line read in one piece (asyncio's default is 64 KiB)
+LINE_LIMIT = 1 << 20
+
+# Results of recent runs, keyed by tree state and pytest argv; oldest evicted first
+RESULT_CACHE_SIZE = 128
+_results: OrderedDict = OrderedDict()
 
 class RunPytestRequest(BaseModel):
     path: str = "/repos/repo"
+    # opt-in speedups; the defaults run the whole suite exactly as before
+    only_failed: bool = False  # --lf: rerun last failures (pytest runs everything when none are recorded)
+    fail_fast: bool = False    # -x: stop at the first failure
+    jobs: int = 1              # > 1 spreads tests over pytest-xdist workers (-n); needs pytest-xdist
 
-@app.post("/run_pytest")
-def run_pytest(req: RunPytestRequest):
-    result = subprocess.run(
-        ["pytest", req.path, "-q", "--tb=short"],
-        capture_output=True, text=True
+def pytest_argv(req: RunPytestRequest) -> list[str]:
+    argv = ["pytest", req.path, "-q", "--tb=short"]
+    if req.only_failed:
+        argv.append("--lf")
+    if req.fail_fast:
+        argv.append("-x")
+    if req.jobs > 1:
+        argv += ["-n", str(req.jobs)]
+    return argv
+
+async def pytest_results(argv: list[str]) -> dict:
+    # awaited rather than subprocess.run, so a long test run doesn't pin a threadpool worker;
+    # lines are tallied as pytest prints them instead of buffering the whole log
+    proc = await asyncio.create_subprocess_exec(
+        *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, limit=LINE_LIMIT
     )
-    output = result.stdout + result.stderr
-    passed = output.count("PASSED")
-    failed = output.count("FAILED")
-    errors = [line for line in output.splitlines() if "E   " in line]
+    passed = failed = 0
+    errors = []
+    async for line in proc.stdout:
+        passed += line.count(b"PASSED")
+        failed += line.count(b"FAILED")
+        if b"E   " in line:
+            errors.append(line.rstrip(b"\r\n").decode(errors="replace"))
+    await proc.wait()
     return {"passed": passed, "failed": failed, "errors": errors}
 
+@app.post("/run_pytest")
+async def run_pytest(req: RunPytestRequest):
+    argv = pytest_argv(req)
+    key = (os.path.realpath(req.path), await asyncio.to_thread(tree_state, req.path), tuple(argv))
+    if key in _results:
+        _results.move_to_end(key)
+        return _results[key]
+    result = await pytest_results(argv)
+    _results[key] = result
+    if len(_results) > RESULT_CACHE_SIZE:
+        _results.popitem(last=False)
+    return result
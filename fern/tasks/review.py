@@ -1,8 +1,34 @@
 # Review tasks
 
-from fern.tools.shell import run_cmd
+from pathlib import Path
+from fern.core.state import state_dir
+from fern.tools.shell import run_batch
+from fern.tools.fingerprint import tree_state
+from fern.tools.logger import log_info
+
+# In order, in one shell: each fixer reads what the previous one wrote, and pytest must
+# not import files while `ruff --fix` is still rewriting them (same as cli batch)
+REVIEW_CMDS = ["ruff format .", "ruff check --fix .", "pytest -q"]
+
+def _last_state_file(repo: Path) -> Path:
+    return repo / ".fern" / "last_repo_review"
 
 def review_repo(repo):
-    run_cmd(repo, "ruff format . || true")
-    run_cmd(repo, "ruff check --fix . || true")
-    run_cmd(repo, "pytest -q || true")
+    repo = Path(repo)
+    state = tree_state(repo)
+    try:
+        if _last_state_file(repo).read_text() == state:
+            log_info("No changes since the last review, skipping ruff and pytest.")
+            return
+    except OSError:
+        pass
+
+    # exit codes are ignored, so a failing step doesn't stop the rest
+    run_batch(repo, REVIEW_CMDS)
+
+    # taken after the fixers ran, so their own edits don't trigger the next review
+    try:
+        state_dir(repo)
+        _last_state_file(repo).write_text(tree_state(repo))
+    except OSError:
+        pass
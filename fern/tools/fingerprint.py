@@ -0,0 +1,54 @@
+# Working-tree fingerprints
+# Standard library only: the fern-tests server image copies this file in as-is.
+import fnmatch, hashlib, os, subprocess
+
+# FERN's own state and tool caches change on every run without changing the code
+EXCLUDE_DIRS = (".fern", ".pytest_cache", ".mypy_cache", ".ruff_cache")
+# Never worth walking when git can't list the tree
+WALK_SKIP_DIRS = frozenset({".git", "venv", ".venv", "node_modules", "__pycache__", *EXCLUDE_DIRS})
+GIT_TIMEOUT = 30
+
+def tree_state(repo_dir, *pathspecs: str) -> str:
+    """Fingerprint of the working tree, or of the files matching `pathspecs` (git pathspecs).
+
+    In a git checkout: HEAD plus `git status` plus size/mtime of every file it lists.
+    Elsewhere: path, size and mtime of every file under repo_dir.
+    """
+    root = os.fspath(repo_dir)
+    return _git_state(root, pathspecs) or _walk_state(root, pathspecs)
+
+def _git_state(root: str, pathspecs: tuple) -> str | None:
+    h = hashlib.blake2b(digest_size=16)
+    spec = ["--", *(pathspecs or (".",)), *(f":!{d}" for d in EXCLUDE_DIRS)]
+    try:
+        for argv in (["git", "rev-parse", "HEAD"],
+                     ["git", "status", "--porcelain", "-z", "--untracked-files=all", *spec]):
+            out = subprocess.run(argv, cwd=root, capture_output=True, timeout=GIT_TIMEOUT)
+            if out.returncode != 0:
+                return None
+            h.update(out.stdout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    for entry in filter(None, out.stdout.split(b"\0")):
+        try:
+            st = os.stat(os.path.join(os.fsencode(root), entry[3:]))
+        except (OSError, ValueError):
+            continue  # deleted files, rename sources
+        h.update(b"%d:%d\0" % (st.st_size, st.st_mtime_ns))
+    return h.hexdigest()
+
+def _walk_state(root: str, pathspecs: tuple) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in WALK_SKIP_DIRS)
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            if pathspecs and not any(fnmatch.fnmatchcase(rel, p) for p in pathspecs):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            h.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
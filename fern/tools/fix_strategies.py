@@ -1,16 +1,29 @@
 # Fix strategies for RL
-from fern.tools.llm import complete
+from fern.tools.llm import complete_stream
 from fern.tools.fs import snapshot_repo, write_file
-import json
+from contextlib import closing
+import orjson
+
+def _read_changes(chunks) -> list:
+    """Parse the JSON change list, stopping the stream as soon as the array is complete."""
+    buf = ""
+    for piece in chunks:
+        buf += piece
+        if "]" in piece and buf.rstrip().endswith("]"):
+            try:
+                return orjson.loads(buf[buf.find("["):])
+            except orjson.JSONDecodeError:
+                pass  # a "]" inside a string or nested list; keep reading
+    return orjson.loads(buf)
 
 def apply_fix_strategy(repo, action: str, context: dict):
     snap = snapshot_repo(repo, max_chars=10000)
     sys = f"You are a code fixer. Strategy: {action}. Apply minimal safe changes."
     prompt = f"Goal: {context.get('goal')}\n\nErrors:\n{context.get('err_type')}\n\nSnapshot:\n{snap}\n\nReturn JSON: [{{'file':'path','content':'new file content'}}]"
-    txt = complete(prompt, sys=sys)
 
     try:
-        changes = json.loads(txt)
+        with closing(complete_stream(prompt, sys=sys)) as stream:
+            changes = _read_changes(stream)
         for ch in changes:
             write_file(repo, ch["file"], ch["content"])
     except Exception as e:
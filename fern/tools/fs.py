@@ -1,16 +1,93 @@
 # Filesystem utilities
+import os, stat, subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# never descended into, so nothing under them is listed or stat'd
+SKIP_DIRS = frozenset({".git", "venv", "node_modules", "__pycache__"})
+MAX_SNAPSHOT_FILE = 200 * 1024
+# files read concurrently; the reads are syscall/IO bound, so threads overlap them fine
+SNAPSHOT_READERS = 16
+
+def _walk_files(root: str, rel: str = ""):
+    """Yield (path, repo-relative path, size) for small files, a directory's files before its subdirs."""
+    subdirs = []
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            subdirs.append(entry)
+                    elif entry.is_file():
+                        size = entry.stat().st_size
+                        if size < MAX_SNAPSHOT_FILE:
+                            yield entry.path, rel + entry.name, size
+                except OSError:
+                    pass
+    except OSError:
+        return
+    for entry in subdirs:
+        yield from _walk_files(entry.path, f"{rel}{entry.name}/")
+
+def _git_files(root: str):
+    """Like _walk_files, but lets git list tracked and untracked-not-ignored files, so
+    .gitignore'd trees (build output, caches, virtualenvs) are never touched.
+    Returns None when git can't list the repo."""
+    if not os.path.exists(os.path.join(root, ".git")):
+        return None
+    try:
+        out = subprocess.run(["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+                             cwd=root, capture_output=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if out.returncode != 0:
+        return None
+    return _stat_listed(root, dict.fromkeys(os.fsdecode(p) for p in out.stdout.split(b"\0") if p))
+
+def _stat_listed(root: str, rels):
+    for rel in rels:
+        if not SKIP_DIRS.isdisjoint(rel.split("/")[:-1]):
+            continue
+        path = os.path.join(root, rel)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue  # deleted in the worktree
+        if stat.S_ISREG(st.st_mode) and st.st_size < MAX_SNAPSHOT_FILE:
+            yield path, rel, st.st_size
+
+def _read_text(path: str) -> str | None:
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            return f.read()
+    except Exception:
+        return None
+
 def snapshot_repo(repo: Path, max_chars: int = 40000) -> str:
     parts = []
-    for p in repo.rglob("*"):
-        if p.is_file() and p.stat().st_size < 200*1024 and "venv" not in p.parts and ".git" not in p.parts:
-            try:
-                text = p.read_text(encoding="utf-8", errors="ignore")
-                parts.append(f"--- {p.relative_to(repo)} ---\n{text}\n")
-            except Exception:
-                pass
-        if sum(len(x) for x in parts) > max_chars: break
+    total = 0
+    files = _git_files(str(repo)) or _walk_files(str(repo))
+    with ThreadPoolExecutor(max_workers=SNAPSHOT_READERS) as pool:
+        while total <= max_chars:
+            # Take files until their sizes alone would cross the budget. Decoded text is never
+            # longer than the bytes on disk, so every file in the wave is one a sequential
+            # read would also have reached.
+            wave = []
+            room = max_chars - total
+            for path, rel, size in files:
+                wave.append((path, rel))
+                room -= len(rel) + size + 10  # header "--- ... ---\n" plus trailing newline
+                if room < 0:
+                    break
+            if not wave:
+                break
+            for (_, rel), text in zip(wave, pool.map(_read_text, [p for p, _ in wave])):
+                if text is not None:
+                    chunk = f"--- {rel} ---\n{text}\n"
+                    parts.append(chunk)
+                    total += len(chunk)
+                if total > max_chars: break
     return "\n".join(parts)
 
 def write_file(repo: Path, rel: str, content: str):
@@ -18,7 +95,10 @@ def write_file(repo: Path, rel: str, content: str):
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(content, encoding="utf-8")
 
-def apply_code_task(repo: Path, task: dict):
+def apply_code_task(repo: Path, task: dict) -> list[str]:
+    """Apply a code/fs task; returns the repo-relative paths it wrote."""
     args = task.get("args", {})
     if "file" in args and "content" in args:
         write_file(repo, args["file"], args["content"])
+        return [args["file"]]
+    return []
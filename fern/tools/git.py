@@ -1,26 +1,47 @@
 # Git integration
+from functools import lru_cache
 from pathlib import Path
 from git import Repo
 
+GIT_TIMEOUT = 30  # seconds, passed to GitPython as kill_after_timeout
+
 def git_init(repo_dir: Path):
     if (repo_dir / ".git").exists():
         return
     Repo.init(repo_dir).index.commit("chore: initial")
 
+@lru_cache(maxsize=32)
+def _open_repo(path: str) -> Repo:
+    # kept open across calls so GitPython's persistent `git cat-file` helpers are reused
+    return Repo(path)
+
+def open_repo(repo_dir: Path) -> Repo:
+    return _open_repo(str(Path(repo_dir).resolve()))
+
 def ensure_branch(repo_dir: Path, name: str):
-    repo = Repo(repo_dir)
+    repo = open_repo(repo_dir)
     if repo.active_branch.name != name:
         if name in repo.branches:
-            repo.git.checkout(name)
+            repo.git.checkout(name, kill_after_timeout=GIT_TIMEOUT)
         else:
-            repo.git.checkout("-b", name)
+            repo.git.checkout("-b", name, kill_after_timeout=GIT_TIMEOUT)
 
 def git_commit_all(repo_dir: Path, msg: str):
-    repo = Repo(repo_dir)
-    repo.git.add(A=True)
-    if repo.is_dirty():
+    repo = open_repo(repo_dir)
+    repo.git.add(A=True, kill_after_timeout=GIT_TIMEOUT)
+    # after `add -A` the worktree matches the index, so only the index needs diffing
+    if repo.is_dirty(working_tree=False):
+        repo.index.commit(msg)
+
+def git_commit_paths(repo_dir: Path, paths: list[str], msg: str):
+    """Stage only `paths` (no full worktree scan) and commit if the index changed."""
+    if not paths:
+        return
+    repo = open_repo(repo_dir)
+    repo.git.add("--", *paths, kill_after_timeout=GIT_TIMEOUT)
+    if repo.is_dirty(working_tree=False):
         repo.index.commit(msg)
 
 def git_push(repo_dir: Path, remote: str, branch: str):
-    repo = Repo(repo_dir)
+    repo = open_repo(repo_dir)
     repo.git.push("--set-upstream", remote, branch)
\ No newline at end of file
@@ -1,30 +1,148 @@
 # LLM provider integration
-import os, httpx, json
+import os, re, httpx, orjson, textwrap
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def load_config():
     config_path = Path(".fern/config.json")
     if config_path.exists():
         try:
-            return json.loads(config_path.read_text())
+            return orjson.loads(config_path.read_bytes())
         except Exception:
             return {}
     return {}
 
 CONFIG = load_config()
 
+# keep_alive keeps Ollama on the same warm model slot across calls, so byte-identical
+# system-prompt prefixes hit its KV cache. Sampling/context options are only sent
+# when configured; otherwise the model's own defaults apply.
+_NUM_CTX = os.getenv("LLM_NUM_CTX") or CONFIG.get("LLM_NUM_CTX")
+_TEMPERATURE = os.getenv("LLM_TEMPERATURE") or CONFIG.get("LLM_TEMPERATURE")
+OLLAMA_OPTIONS = {
+    **({"num_ctx": int(_NUM_CTX)} if _NUM_CTX else {}),
+    **({"temperature": float(_TEMPERATURE)} if _TEMPERATURE not in (None, "") else {}),
+}
+OLLAMA_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE") or CONFIG.get("LLM_KEEP_ALIVE", "30m")
+
+def system_prompt(text: str) -> str:
+    """Normalize a system prompt once at import so every request sends identical bytes."""
+    return textwrap.dedent(text).strip()
+
+def extract_json_object(text: str) -> str:
+    """Return the first balanced {...} block in LLM output (string/escape aware).
+
+    Falls back to the input unchanged when no complete object is found, so the
+    caller's JSON parser reports the real error.
+    """
+    stripped = text.strip()
+    if stripped.startswith("{") and stripped.endswith("}"):
+        return stripped
+    start = text.find("{")
+    if start == -1:
+        return text
+    depth = 0
+    in_str = escape = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_str:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text
+
+OLLAMA_URL = "http://localhost:11434/api/generate"
+
+# One pooled client for every request, so calls reuse a kept-alive connection to Ollama
+# instead of opening a new one each time. httpx.Client is safe to share across threads.
+_CLIENT = httpx.Client(timeout=600, limits=httpx.Limits(max_keepalive_connections=8))
+
+def resolve_model(provider: str | None, model: str | None) -> tuple[str, str]:
+    return (provider or os.getenv("LLM_PROVIDER") or CONFIG.get("LLM_PROVIDER", "ollama"),
+            model or os.getenv("LLM_MODEL") or CONFIG.get("LLM_MODEL", "qwen2.5-coder:7b"))
+
+def _ollama_body(model: str, prompt: str, sys: str, stream: bool) -> dict:
+    body = {"model": model, "prompt": f"{sys}\n\n{prompt}", "stream": stream,
+            "keep_alive": OLLAMA_KEEP_ALIVE}
+    if OLLAMA_OPTIONS:
+        body["options"] = OLLAMA_OPTIONS
+    return body
+
 def complete(prompt: str, sys: str = "", provider: str | None = None, model: str | None = None) -> str:
-    provider = provider or os.getenv("LLM_PROVIDER") or CONFIG.get("LLM_PROVIDER", "ollama")
-    model = model or os.getenv("LLM_MODEL") or CONFIG.get("LLM_MODEL", "qwen2.5-coder:7b")
+    provider, model = resolve_model(provider, model)
 
     if provider == "ollama":
         # requires `ollama serve` running locally
-        resp = httpx.post(
-            "http://localhost:11434/api/generate",
-            json={"model": model, "prompt": f"{sys}\n\n{prompt}", "stream": False},
-            timeout=600
-        )
+        resp = _CLIENT.post(OLLAMA_URL, json=_ollama_body(model, prompt, sys, False))
         resp.raise_for_status()
-        return resp.json()["response"]
+        return orjson.loads(resp.content)["response"]
 
     raise RuntimeError(f"Unknown LLM provider: {provider}")
+
+def complete_stream(prompt: str, sys: str = "", provider: str | None = None, model: str | None = None):
+    """Yield the completion in pieces as the model produces them.
+
+    Closing the generator early (e.g. breaking out of the loop) drops the connection,
+    which stops the generation server-side.
+    """
+    provider, model = resolve_model(provider, model)
+
+    if provider == "ollama":
+        with _CLIENT.stream("POST", OLLAMA_URL, json=_ollama_body(model, prompt, sys, True)) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    return
+        return
+
+    raise RuntimeError(f"Unknown LLM provider: {provider}")
+
+def complete_many(prompts: list[str], sys: str = "", **kwargs) -> list[str]:
+    """complete() for several independent prompts, sent concurrently over the shared client."""
+    if len(prompts) <= 1:
+        return [complete(p, sys=sys, **kwargs) for p in prompts]
+    with ThreadPoolExecutor(max_workers=min(len(prompts), 8)) as pool:
+        return list(pool.map(lambda p: complete(p, sys=sys, **kwargs), prompts))
+
+_BATCH_HEADER = re.compile(r"^#{1,6}\s*Response\s+(\d+)\s*:?\s*$", re.MULTILINE | re.IGNORECASE)
+
+def complete_batch(prompts: list[str], sys: str = "", **kwargs) -> list[str]:
+    """Answer several prompts with one LLM call; one response string per prompt.
+
+    Sections the model leaves out are asked again on their own, concurrently.
+    """
+    if len(prompts) <= 1:
+        return [complete(p, sys=sys, **kwargs) for p in prompts]
+    parts = [f"Answer each of the {len(prompts)} requests below independently.",
+             "Start each answer with its own header line '### Response <n>' and nothing else on that line."]
+    for i, p in enumerate(prompts, 1):
+        parts.append(f"### Request {i}\n{p}")
+    text = complete("\n\n".join(parts), sys=sys, **kwargs)
+
+    out = [""] * len(prompts)
+    headers = list(_BATCH_HEADER.finditer(text))
+    for h, nxt in zip(headers, headers[1:] + [None]):
+        n = int(h.group(1))
+        if 1 <= n <= len(prompts):
+            out[n - 1] = text[h.end():nxt.start() if nxt else len(text)].strip()
+    dropped = [i for i, r in enumerate(out) if not r]
+    if dropped:
+        for i, r in zip(dropped, complete_many([prompts[i] for i in dropped], sys=sys, **kwargs)):
+            out[i] = r
+    return out
@@ -0,0 +1,249 @@
+# Cached LLM completions
+import atexit, copy, hashlib, os, tempfile, threading
+from functools import lru_cache
+from pathlib import Path
+import orjson
+from fern.tools.llm import complete, complete_batch, extract_json_object, resolve_model
+
+# Content-addressed disk cache shared across runs and repos
+CACHE_DIR = Path(os.getenv("FERN_CACHE_DIR") or Path.home() / ".cache" / "fern") / "llm"
+STATS_FILE = CACHE_DIR / "stats.json"
+# Entries beyond this are pruned least-recently-used first (hits refresh an entry's mtime)
+CACHE_MAX_ENTRIES = int(os.getenv("FERN_CACHE_MAX_ENTRIES") or 5000)
+PRUNE_EVERY = 64  # writes between prune passes
+
+_lock = threading.Lock()
+_session_stats = {"hits": 0, "misses": 0}
+_puts = 0
+
+@lru_cache(maxsize=32)
+def _sys_hasher(sys: str):
+    # system prompts are a handful of long module constants; absorb each once
+    h = hashlib.sha256()
+    h.update(sys.encode())
+    h.update(b"\x1f")
+    return h
+
+def cache_key(prompt: str, sys: str = "", provider: str | None = None, model: str | None = None,
+              **kwargs) -> str:
+    h = _sys_hasher(sys).copy()
+    h.update(prompt.encode())
+    # the model that will actually answer, whether passed in or taken from env/config
+    h.update(b"\x1f%s/%s" % tuple(x.encode() for x in resolve_model(provider, model)))
+    if kwargs:
+        h.update(b"\x1f")
+        h.update(orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS))
+    return h.hexdigest()
+
+def _entry_path(key: str) -> Path:
+    return CACHE_DIR / key[:2] / f"{key}.json"
+
+def _atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _disk_get(key: str) -> str | None:
+    path = _entry_path(key)
+    try:
+        response = orjson.loads(path.read_bytes())["response"]
+    except Exception:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return response
+
+def _disk_put(key: str, response: str):
+    global _puts
+    try:
+        _atomic_write(_entry_path(key), orjson.dumps({"response": response}))
+    except OSError:
+        return
+    with _lock:
+        _puts += 1
+        due = _puts % PRUNE_EVERY == 0
+    if due:
+        prune()
+
+def prune(max_entries: int = CACHE_MAX_ENTRIES) -> int:
+    """Delete the least recently used entries beyond max_entries; returns how many went."""
+    entries = []
+    # entries live in the two-hex-digit shard dirs; stats and index files sit in CACHE_DIR itself
+    for path in CACHE_DIR.glob("??/*.json"):
+        try:
+            entries.append((path.stat().st_mtime_ns, path))
+        except OSError:
+            continue
+    if len(entries) <= max_entries:
+        return 0
+    entries.sort()
+    removed = 0
+    for _, path in entries[:len(entries) - max_entries]:
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+def _disk_drop(key: str):
+    try:
+        _entry_path(key).unlink()
+    except OSError:
+        pass
+
+def cached_complete(prompt: str, sys: str = "", **kwargs) -> str:
+    """complete() backed by the disk cache; kwargs are forwarded and part of the key."""
+    key = cache_key(prompt, sys, **kwargs)
+    response = _disk_get(key)
+    with _lock:
+        _session_stats["hits" if response is not None else "misses"] += 1
+    if response is None:
+        response = complete(prompt, sys=sys, **kwargs)
+        _disk_put(key, response)
+    return response
+
+def evict(prompt: str, sys: str = "", **kwargs):
+    """Forget a cached reply the caller could not use, so the next call asks the model again."""
+    _disk_drop(cache_key(prompt, sys, **kwargs))
+
+def cached_complete_batch(prompts: list[str], sys: str = "", **kwargs) -> list[str]:
+    """Batch variant of cached_complete(): hits come from disk, misses share one LLM call."""
+    keys = [cache_key(p, sys, **kwargs) for p in prompts]
+    responses = [_disk_get(k) for k in keys]
+    missing = [i for i, r in enumerate(responses) if r is None]
+    with _lock:
+        _session_stats["hits"] += len(prompts) - len(missing)
+        _session_stats["misses"] += len(missing)
+    if missing:
+        fresh = complete_batch([prompts[i] for i in missing], sys=sys, **kwargs)
+        for i, response in zip(missing, fresh):
+            responses[i] = response
+            if response:
+                _disk_put(keys[i], response)
+    return responses
+
+@lru_cache(maxsize=256)
+def _cached_complete_json(key: str, prompt: str, sys: str):
+    text = cached_complete(prompt, sys=sys)
+    try:
+        return orjson.loads(extract_json_object(text))
+    except orjson.JSONDecodeError:
+        # don't pin an unparseable reply on disk; the next call asks the model again
+        _disk_drop(key)
+        raise
+
+def complete_json(prompt: str, sys: str = ""):
+    """complete() + JSON parse, memoized by prompt hash. Parse failures are not cached."""
+    # callers may mutate the result, so never hand out the cached object itself
+    return copy.deepcopy(_cached_complete_json(cache_key(prompt, sys), prompt, sys))
+
+def cache_stats() -> dict:
+    """Lifetime hit/miss counters (persisted runs + this process)."""
+    try:
+        stats = orjson.loads(STATS_FILE.read_bytes())
+    except Exception:
+        stats = {"hits": 0, "misses": 0}
+    with _lock:
+        return {k: stats.get(k, 0) + _session_stats[k] for k in ("hits", "misses")}
+
+@atexit.register
+def _prune_on_exit():
+    if _puts % PRUNE_EVERY:
+        prune()
+
+@atexit.register
+def _flush_stats():
+    if not any(_session_stats.values()):
+        return
+    try:
+        _atomic_write(STATS_FILE, orjson.dumps(cache_stats()))
+    except OSError:
+        pass
+
+# Optional semantic layer: reuse the answer of a near-identical earlier prompt.
+# Opt-in (FERN_SEMANTIC_CACHE=1) and only active when sentence-transformers is installed.
+SEMANTIC_ENABLED = os.getenv("FERN_SEMANTIC_CACHE") == "1"
+SEMANTIC_MODEL = "all-MiniLM-L6-v2"
+SEMANTIC_THRESHOLD = 0.92
+INDEX_FILE = CACHE_DIR / "index.npy"
+INDEX_KEYS_FILE = CACHE_DIR / "index.json"
+
+_semantic = None  # [model, embeddings, [(scope, key), ...]] once loaded
+
+def _semantic_index():
+    global _semantic
+    if _semantic is None:
+        import numpy as np
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(SEMANTIC_MODEL)
+        try:
+            embeds = np.load(INDEX_FILE)
+            keys = [tuple(k) for k in orjson.loads(INDEX_KEYS_FILE.read_bytes())]
+            if len(keys) != len(embeds):
+                raise ValueError("index out of sync")
+        except Exception:
+            embeds = np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+            keys = []
+        _semantic = [model, embeds, keys]
+    return _semantic
+
+def _embed_text(prompt: str) -> str:
+    # file listings come in filesystem order; line order shouldn't change the match
+    return "\n".join(sorted(line.strip() for line in prompt.splitlines() if line.strip()))
+
+def _semantic_add(vec, scope: str, key: str):
+    import io
+    import numpy as np
+    with _lock:
+        _semantic[1] = np.vstack([_semantic[1], vec[None, :]])
+        _semantic[2].append((scope, key))
+        buf = io.BytesIO()
+        np.save(buf, _semantic[1])
+        keys = orjson.dumps(_semantic[2])
+    try:
+        _atomic_write(INDEX_FILE, buf.getvalue())
+        _atomic_write(INDEX_KEYS_FILE, keys)
+    except OSError:
+        pass
+
+def semantic_complete(prompt: str, sys: str = "", threshold: float = SEMANTIC_THRESHOLD, **kwargs) -> str:
+    """cached_complete() that also matches earlier prompts by embedding similarity.
+    Falls back to exact-match caching when disabled or sentence-transformers is missing."""
+    if not SEMANTIC_ENABLED:
+        return cached_complete(prompt, sys=sys, **kwargs)
+    try:
+        model, _, _ = _semantic_index()
+    except ImportError:
+        return cached_complete(prompt, sys=sys, **kwargs)
+
+    key = cache_key(prompt, sys, **kwargs)
+    response = _disk_get(key)
+    if response is None:
+        # only compare against prompts sent with the same system prompt and options
+        scope = cache_key("", sys, **kwargs)
+        vec = model.encode([_embed_text(prompt)], normalize_embeddings=True)[0].astype("float32")
+        with _lock:
+            embeds, keys = _semantic[1], list(_semantic[2])
+        rows = [i for i, (s, _) in enumerate(keys) if s == scope]
+        if rows:
+            scores = embeds[rows] @ vec
+            best = int(scores.argmax())
+            if scores[best] > threshold:
+                response = _disk_get(keys[rows[best]][1])
+
+    with _lock:
+        _session_stats["hits" if response is not None else "misses"] += 1
+    if response is None:
+        response = complete(prompt, sys=sys, **kwargs)
+        _disk_put(key, response)
+        _semantic_add(vec, scope, key)
+    return response
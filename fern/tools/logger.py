@@ -1,10 +1,33 @@
 from rich.console import Console
 from datetime import datetime
+import atexit, queue, threading
 
 console = Console()
 
+# Rich markup rendering and the terminal write happen on a background thread, so a hot
+# loop only pays for a queue put. Lines keep their order; flush_logs() waits for them.
+_lines: queue.Queue = queue.Queue()
+
+def _writer():
+    while True:
+        line = _lines.get()
+        try:
+            console.print(line)
+        except Exception:
+            pass
+        finally:
+            _lines.task_done()
+
+threading.Thread(target=_writer, name="fern-log", daemon=True).start()
+
+def flush_logs():
+    """Block until every queued line has been written (before output that bypasses the logger)."""
+    _lines.join()
+
+atexit.register(flush_logs)
+
 def log_step(emoji: str, msg: str, style: str = "bold green"):
-    console.print(f"{emoji} [ {datetime.now().strftime('%H:%M:%S')} ] [ {style}]{msg}[/]")
+    _lines.put(f"{emoji} [ {datetime.now().strftime('%H:%M:%S')} ] [ {style}]{msg}[/]")
 
 def log_info(msg: str):
     log_step("ℹ️", msg, "cyan")
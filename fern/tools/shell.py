@@ -1,10 +1,71 @@
 # Shell helpers
-import subprocess, shlex
+import os, signal, subprocess, shlex, sys, threading
 from pathlib import Path
+from fern.tools.logger import flush_logs
 
-def run_cmd(repo: Path, cmd: str) -> int:
+BATCH_SENTINEL = "::FERN::rc="
+
+# per-tool wall-clock limits (seconds); a hung tool must not stall the agent loop
+# (a cold mypy run on a mid-sized repo easily takes minutes)
+CMD_TIMEOUTS = {"pytest": 600, "ruff": 60, "mypy": 600, "git": 30}
+DEFAULT_TIMEOUT = 600
+TIMEOUT_RC = 124  # same code coreutils `timeout` uses
+
+def cmd_timeout(argv: list[str]) -> int:
+    return CMD_TIMEOUTS.get(Path(argv[0]).name, DEFAULT_TIMEOUT) if argv else DEFAULT_TIMEOUT
+
+def run_cmd(repo: Path, cmd: str, timeout: float | None = None) -> int:
+    flush_logs()  # the child writes straight to the terminal; queued log lines go first
     print(f"$ {cmd}")
-    return subprocess.call(shlex.split(cmd), cwd=repo)
+    argv = shlex.split(cmd)
+    try:
+        return subprocess.call(argv, cwd=repo, timeout=timeout or cmd_timeout(argv))
+    except subprocess.TimeoutExpired:
+        print(f"[shell] timed out: {cmd}")
+        return TIMEOUT_RC
+
+def run_batch(repo: Path, cmds: list[str]) -> list[int]:
+    """Run several commands in one shell process; returns one exit code per command."""
+    script = []
+    budget = 0
+    for cmd in cmds:
+        argv = shlex.split(cmd)
+        budget += cmd_timeout(argv)
+        script.append(shlex.join(["echo", f"$ {cmd}"]))
+        # re-quote so each command keeps run_cmd's argv semantics (no shell expansion)
+        script.append(shlex.join(argv))
+        script.append(f'echo "{BATCH_SENTINEL}$?"')
+    rcs: list[int] = []
+    timed_out = threading.Event()
+    flush_logs()
+    try:
+        with subprocess.Popen(["sh", "-c", "\n".join(script)], cwd=repo,
+                              stdout=subprocess.PIPE, text=True, start_new_session=True) as proc:
+            def _kill():
+                # kill the whole group so a hung child can't keep the pipe open
+                timed_out.set()
+                os.killpg(proc.pid, signal.SIGKILL)
+            timer = threading.Timer(budget, _kill)
+            timer.start()
+            try:
+                for line in proc.stdout:
+                    out, found, rc = line.partition(BATCH_SENTINEL)
+                    if found:
+                        if out:
+                            sys.stdout.write(out + "\n")
+                        rcs.append(int(rc))
+                    else:
+                        sys.stdout.write(line)
+            finally:
+                timer.cancel()
+    except Exception as e:
+        print(f"[shell] batch failed: {e}")
+    if timed_out.is_set() and len(rcs) < len(cmds):
+        print(f"[shell] timed out: {cmds[len(rcs)]}")
+        rcs.append(TIMEOUT_RC)
+    # fall back to one process per command for anything the batch didn't report
+    rcs += [run_cmd(repo, cmd) for cmd in cmds[len(rcs):]]
+    return rcs
 
 def run_tests(repo: Path, cmd: str = "pytest -q"):
     return run_cmd(repo, cmd)